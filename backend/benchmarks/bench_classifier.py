@@ -0,0 +1,163 @@
+"""
+Benchmark: substring-scan classification (the old classify_incident, and
+the same scan generalised to a rules file) vs. the rule classifier, over a
+synthetic corpus of incident titles and descriptions.
+
+Substring scans cost one pass per keyword, so they slow down linearly as
+rules are added; the classifier scans each text once with one compiled
+regex whatever the rule count. --extra-keywords grows the shipped rules
+with synthetic vendor/product keywords to show the crossover; "vs legacy"
+is the per-item speedup over the old hard-coded check, measured in the
+same rounds. Also reports how many items the old and new rules label
+differently, since keywords now match whole words only.
+
+Run from the backend folder:
+    python benchmarks/bench_classifier.py --n 50000 --extra-keywords 0 50 200 1000
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from incident_classifier import CLASSIFIER_RULES_FILE, DIMENSIONS, IncidentClassifier
+
+SUBJECTS = ["RBI", "State Bank of India", "UPI payment app", "Ministry of Defence", "NIC portal",
+            "mha.gov.in", "power grid operator", "telecom major", "Delhi airport", "oil refinery",
+            "private clinic", "technical university", "edtech startup", "hospital chain", "BSE-listed firm"]
+EVENTS = ["ransomware attack", "data breach", "customer data leaked", "phishing campaign",
+          "malware infection", "critical vulnerability", "zero-day exploited", "DDoS outage",
+          "attack confirmed by CERT-In", "vulnerabilities patched", "website defaced", "security audit"]
+TEMPLATES = [
+    "{subject} hit by {event}",
+    "{event} reported at {subject}",
+    "CERT-In advisory: {event} affecting {subject}",
+    "Hackers target {subject}; {event} under investigation",
+]
+ORIGINS = ["Google News RSS"] * 9 + ["URLHaus"]
+
+
+def legacy_classify(title, description, origin):
+    """The pre-rules implementation: substring scans over hard-coded lists."""
+    text = (title + " " + description).lower()
+    if "ransomware" in text or "breach" in text or "leak" in text or "attack confirmed" in text or origin == "URLHaus":
+        severity = "High"
+    elif "phishing" in text or "malware" in text or "vulnerability" in text or "exploit" in text:
+        severity = "Medium"
+    else:
+        severity = "Low"
+    if any(keyword in text for keyword in ["rbi", "bank", "upi", "payment"]):
+        sector = "Banking"
+    elif any(keyword in text for keyword in ["ministry", "gov.in", "nic"]):
+        sector = "Government"
+    elif any(keyword in text for keyword in ["power", "telecom", "airport", "oil"]):
+        sector = "Infrastructure"
+    else:
+        sector = "General"
+    return severity, sector
+
+
+def substring_classifier(rules):
+    """The old scan strategy over a rules dict: `in` per keyword, rules in priority order."""
+    plan = []
+    for dim in DIMENSIONS:
+        plan.append((rules[dim]["default"], [
+            (rule["label"], [k.rstrip("*") for k in rule.get("keywords", [])], set(rule.get("origins", [])))
+            for rule in rules[dim]["rules"]
+        ]))
+
+    def classify(title, description, origin):
+        text = (title + " " + description).lower()
+        labels = []
+        for default, dim_rules in plan:
+            for label, keywords, origins in dim_rules:
+                if origin in origins or any(keyword in text for keyword in keywords):
+                    labels.append(label)
+                    break
+            else:
+                labels.append(default)
+        return labels[0], labels[1]
+    return classify
+
+
+def with_extra_keywords(rules, n, seed=0):
+    """Spreads n synthetic single-word keywords over every rule."""
+    rng = random.Random(seed)
+    rules = copy.deepcopy(rules)
+    targets = [rule for dim in DIMENSIONS for rule in rules[dim]["rules"]]
+    for i in range(n):
+        word = "".join(rng.choice("bcdfghjklmnpqrstvwxz") for _ in range(rng.randint(6, 10)))
+        targets[i % len(targets)].setdefault("keywords", []).append(word)
+    return rules
+
+
+def build_corpus(n, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        title = rng.choice(TEMPLATES).format(subject=rng.choice(SUBJECTS), event=rng.choice(EVENTS))
+        description = f"{rng.choice(SUBJECTS)} said {rng.choice(EVENTS)} was contained within hours."
+        corpus.append((title, description, rng.choice(ORIGINS)))
+    return corpus
+
+
+def best_of(fns, repeats):
+    """
+    Best time in seconds of each function over `repeats` rounds. The
+    functions take turns within a round, so a slow spell on the machine
+    does not favour one of them.
+    """
+    timings = [[] for _ in fns]
+    for _ in range(repeats):
+        for fn, times in zip(fns, timings):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    return [min(times) for times in timings]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--extra-keywords", type=int, nargs="+", default=[0, 50, 200, 1000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.n)
+    with open(CLASSIFIER_RULES_FILE, "r", encoding="utf-8") as f:
+        base_rules = json.load(f)
+
+    legacy = [legacy_classify(*item) for item in corpus]
+    print(f"{len(corpus)} items, items/s best of {args.repeats} rounds")
+    print(f"{'keywords':>9} {'legacy/s':>10} {'substring/s':>12} {'rules/s':>10} {'rules batch/s':>14} {'vs legacy':>10}")
+    for extra in args.extra_keywords:
+        rules = with_extra_keywords(base_rules, extra)
+        n_keywords = sum(len(r.get("keywords", [])) for d in DIMENSIONS for r in rules[d]["rules"])
+        scan = substring_classifier(rules)
+        classifier = IncidentClassifier(rules)
+        single = [classifier.classify(*item) for item in corpus]
+        assert single == classifier.classify_batch(corpus), "batch and per-item classification disagree"
+        legacy_s, scan_s, single_s, batch_s = best_of([
+            lambda: [legacy_classify(*item) for item in corpus],
+            lambda: [scan(*item) for item in corpus],
+            lambda: [classifier.classify(*item) for item in corpus],
+            lambda: classifier.classify_batch(corpus),
+        ], args.repeats)
+        print(f"{n_keywords:>9} {len(corpus) / legacy_s:>10,.0f} {len(corpus) / scan_s:>12,.0f} "
+              f"{len(corpus) / single_s:>10,.0f} {len(corpus) / batch_s:>14,.0f} {legacy_s / single_s:>9.2f}x")
+
+    classifier = IncidentClassifier(base_rules)
+    changed = [(item, old, classifier.classify(*item)) for item, old in zip(corpus, legacy)]
+    changed = [c for c in changed if c[1] != c[2]]
+    print(f"labelled differently by whole-word rules: {len(changed)} ({len(changed) / len(corpus):.1%}), e.g.")
+    for item, old, new in changed[:3]:
+        print(f"  {item[0]!r}: {old} -> {new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Microbenchmark: the old per-synonym multi-pass _extract_keywords vs. the
+single compiled alternation, over a corpus of analyst-style queries and
+incident titles. Asserts both produce identical keywords on the corpus.
+
+Run from the backend folder:
+    python benchmarks/bench_extract_keywords.py --n 20000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from routers.ai_cve_search import _NOISE_WORDS, _SYNONYM_MAP, _extract_keywords
+
+ATTACKS = ["rce", "remote code execution", "sqli", "sql injection", "xss", "ssrf", "lfi", "csrf",
+           "privesc", "priv esc", "dos", "ddos", "bof", "buffer overflow", "path traversal",
+           "directory traversal", "idor", "auth bypass", "bypass", "deserialization", "zero-day"]
+PRODUCTS = ["apache", "nginx", "iis", "windows", "linux", "android", "ios", "openssl", "openssh",
+            "chrome", "firefox", "wordpress", "log4j", "spring", "php", "node", "nodejs", "docker",
+            "k8s", "vmware", "cisco", "fortinet", "palo alto", "exchange", "sharepoint", "samba",
+            "jenkins", "gitlab", "confluence", "tomcat"]
+QUERY_TEMPLATES = [
+    "{recency} {product} {attack} vulnerabilities",
+    "show me {severity} {attack} in {product}",
+    "any {attack} bugs for {product} {version}?",
+    "{product} {attack}",
+    "find cves about {attack} using {product} and {product2}",
+    "what are the {recency} {severity} {product} issues",
+]
+TITLE_TEMPLATES = [
+    "{Product} {Attack} Vulnerability Exploited in Indian Banks",
+    "Hackers abuse {Product} {Attack} flaw to breach government portal",
+    "CERT-In warns of {severity} {Attack} in {Product} {version}",
+    "Ransomware gang exploits {Product} zero-day; {Attack} patched",
+]
+
+
+def legacy_extract_keywords(raw):
+    """The pre-compiled implementation: one re.sub per synonym, re-sorted per call."""
+    text = raw.lower().strip()
+    sorted_syns = sorted(_SYNONYM_MAP.keys(), key=len, reverse=True)
+    for syn in sorted_syns:
+        replacement = _SYNONYM_MAP[syn]
+        text = re.sub(r'\b' + re.escape(syn) + r'\b', replacement, text)
+    tokens = re.findall(r'[a-z0-9./#_-]+', text)
+    kept = [t for t in tokens if t not in _NOISE_WORDS and len(t) > 1]
+    seen, unique = set(), []
+    for t in kept:
+        if t not in seen:
+            seen.add(t)
+            unique.append(t)
+    return " ".join(unique) if unique else raw.strip()
+
+
+def build_corpus(n, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n):
+        fields = {
+            "attack": rng.choice(ATTACKS), "product": rng.choice(PRODUCTS), "product2": rng.choice(PRODUCTS),
+            "recency": rng.choice(["recent", "latest", "new", ""]),
+            "severity": rng.choice(["critical", "high", "severe", "medium"]),
+            "version": f"{rng.randint(1, 12)}.{rng.randint(0, 9)}",
+        }
+        fields["Attack"], fields["Product"] = fields["attack"].upper(), fields["product"].title()
+        templates = TITLE_TEMPLATES if i % 3 == 0 else QUERY_TEMPLATES
+        corpus.append(rng.choice(templates).format(**fields))
+    return corpus
+
+
+def best_of(fn, corpus, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.n)
+    mismatches = [(t, legacy_extract_keywords(t), _extract_keywords(t))
+                  for t in corpus if legacy_extract_keywords(t) != _extract_keywords(t)]
+    assert not mismatches, f"{len(mismatches)} differences, e.g. {mismatches[:3]}"
+
+    legacy = best_of(legacy_extract_keywords, corpus, args.repeats)
+    compiled = best_of(_extract_keywords, corpus, args.repeats)
+    print(f"{len(corpus)} texts, {len(_SYNONYM_MAP)} synonyms, outputs identical")
+    print(f"  legacy multi-pass   {legacy / len(corpus) * 1e6:8.1f} us/text")
+    print(f"  compiled one-pass   {compiled / len(corpus) * 1e6:8.1f} us/text   ({legacy / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
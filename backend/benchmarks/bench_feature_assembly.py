@@ -0,0 +1,90 @@
+"""
+Microbenchmark: the old pandas feature assembly in CVEPredictor.predict vs.
+the NumPy preallocated-buffer path.
+
+The embedding is served from the predictor's cache in both cases so the
+numbers isolate feature assembly + classifier overhead.
+
+Run from the backend folder:
+    python benchmarks/bench_feature_assembly.py --iterations 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from ml.step_6_prediction import CVEPredictor, clean_text
+
+MODEL_DIR = os.path.join(BACKEND_DIR, "ml", "models")
+
+SAMPLE = {
+    "cve_id": "CVE-BENCH-0001",
+    "cvss_score": 9.8,
+    "description": "A critical remote code execution vulnerability exists in the web server allowing "
+                   "unauthenticated attackers to execute arbitrary shell commands via crafted HTTP requests.",
+    "product": "webcart",
+}
+
+
+def pandas_assembly(predictor, cvss_score, embedding):
+    cvss_scaled = predictor.cvss_scaler.transform([[cvss_score]])[0][0]
+    df_structured = pd.DataFrame({"cvss_normalized": [cvss_scaled]})
+    emb_cols = [f"emb_{i}" for i in range(embedding.shape[1])]
+    emb_df = pd.DataFrame(embedding, columns=emb_cols)
+    return pd.concat([df_structured, emb_df], axis=1)
+
+
+def numpy_assembly(predictor, cvss_score, embedding):
+    return predictor._build_features(
+        predictor._slot, predictor._scale_cvss([cvss_score]), embedding, predictor._row_buffer()
+    )
+
+
+def pandas_predict(predictor, cve_id, cvss_score, description, product):
+    embedding = predictor._embed([f"{clean_text(description)} {product}"])
+    X_input = pandas_assembly(predictor, cvss_score, embedding)
+    prob = predictor.model.predict_proba(X_input)[0][1]
+    pred_class = predictor.model.predict(X_input)[0]
+    return round(prob * 100, 2), pred_class
+
+
+def timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    predictor = CVEPredictor(model_dir=MODEL_DIR)
+    predictor.predict(**SAMPLE)  # populate the embedding cache
+    embedding = predictor._embed([f"{clean_text(SAMPLE['description'])} {SAMPLE['product']}"])
+
+    a = pandas_assembly(predictor, SAMPLE["cvss_score"], embedding).to_numpy()
+    b = numpy_assembly(predictor, SAMPLE["cvss_score"], embedding)
+    slot = predictor._slot
+    assert np.allclose(a[:, [0]], b[:, [slot.cvss_col]]) and np.allclose(a[:, 1:], b[:, slot.emb_cols])
+
+    rows = [
+        ("assembly  pandas", timeit(lambda: pandas_assembly(predictor, SAMPLE["cvss_score"], embedding), args.iterations)),
+        ("assembly  numpy", timeit(lambda: numpy_assembly(predictor, SAMPLE["cvss_score"], embedding), args.iterations)),
+        ("predict   pandas", timeit(lambda: pandas_predict(predictor, **SAMPLE), args.iterations)),
+        ("predict   numpy", timeit(lambda: predictor.predict(**SAMPLE), args.iterations)),
+    ]
+    print(f"Model: {type(predictor.model).__name__}, {args.iterations} iterations (cached embedding)")
+    for label, micros in rows:
+        print(f"  {label:<18} {micros:10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
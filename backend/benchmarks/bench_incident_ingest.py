@@ -0,0 +1,110 @@
+"""
+Benchmark: per-item add/commit/refresh ingestion (IntegrityError on
+duplicates) vs. the bulk path in incident_store, on a feed batch of 10k
+items of which most are already stored.
+
+Each run starts from a fresh database pre-seeded with the duplicate share
+of the batch. Uses a temporary SQLite file unless --database-url is given
+(the tables are dropped and recreated there, so point it at a scratch DB).
+
+Run from the backend folder:
+    python benchmarks/bench_incident_ingest.py --n 10000 --duplicate-share 0.95
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from incident_store import existing_link_hashes, insert_incidents, link_hash
+from models import Incident
+
+
+def synthetic_rows(n, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    return [{
+        "title": f"Ransomware attack hits Indian bank #{i}",
+        "source": "Google News",
+        "severity": rng.choice(["High", "Medium", "Low"]),
+        "sector": rng.choice(["Banking", "Government", "Infrastructure", "General"]),
+        "link": f"https://news.example.in/articles/{i}",
+        "link_hash": link_hash(f"https://news.example.in/articles/{i}"),
+        "origin": "Google News RSS",
+        "published_at": start + timedelta(minutes=i),
+    } for i in range(n)]
+
+
+def legacy_ingest(db, rows):
+    new_ids = []
+    for row in rows:
+        incident = Incident(**row)
+        try:
+            db.add(incident)
+            db.commit()
+            db.refresh(incident)
+            new_ids.append(incident.id)
+        except IntegrityError:
+            db.rollback()
+    return new_ids
+
+
+def bulk_ingest(db, rows):
+    seen = existing_link_hashes(db, [r["link_hash"] for r in rows])
+    return [i.id for i in insert_incidents(db, [r for r in rows if r["link_hash"] not in seen])]
+
+
+def fresh_session(url, seed_rows):
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(Incident.__table__.insert(), seed_rows)
+    db.commit()
+    return engine, db
+
+
+def run(name, ingest, url, rows, seed_rows):
+    engine, db = fresh_session(url, seed_rows)
+    try:
+        start = time.perf_counter()
+        new_ids = ingest(db, rows)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+        engine.dispose()
+    print(f"  {name:<8} {elapsed * 1e3:9.1f} ms   {len(new_ids)} new rows")
+    return elapsed, len(new_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=10000)
+    parser.add_argument("--duplicate-share", type=float, default=0.95)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.n)
+    seed_rows = random.Random(1).sample(rows, int(args.n * args.duplicate_share))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        print(f"{args.n} items, {len(seed_rows)} already stored ({url.split(':', 1)[0]})")
+        legacy_s, legacy_new = run("legacy", legacy_ingest, url, rows, seed_rows)
+        bulk_s, bulk_new = run("bulk", bulk_ingest, url, rows, seed_rows)
+    assert legacy_new == bulk_new, "paths disagree on the number of new rows"
+    print(f"  speedup  {legacy_s / bulk_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: single-process SentenceTransformer.encode vs. the multi-process,
+length-bucketed encoder used by step 3 (--workers).
+
+Reports throughput in sentences/second, checks that every worker count
+produces bit-identical output, and that it matches the single-process
+embeddings within float tolerance.
+
+Run from the backend folder:
+    python benchmarks/bench_parallel_encode.py --n 20000 --workers 2 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sentence_transformers import SentenceTransformer
+
+from ml.parallel_encoder import DEFAULT_TOKENS_PER_BATCH, encode_parallel
+from ml.step_2_data_preprocessing import clean_text
+
+DATA_PATH = os.path.join(BACKEND_DIR, "ml", "data", "cve_part_1.json")
+LOCAL_MODEL = os.path.join(BACKEND_DIR, "ml", "models", "minilm_model")
+
+
+def load_texts(n):
+    with open(DATA_PATH, "r", encoding="utf-8") as file:
+        records = json.load(file)
+    # Same combined text as step 3: cleaned description + ' ' + product
+    texts = [f"{clean_text(r.get('description'))} {r.get('product') or 'unknown'}" for r in records]
+    return [texts[i % len(texts)] for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20000, help="number of sentences to encode")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--tokens-per-batch", type=int, default=DEFAULT_TOKENS_PER_BATCH)
+    parser.add_argument("--model", default=LOCAL_MODEL if os.path.isdir(LOCAL_MODEL) else "all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    texts = load_texts(args.n)
+    model = SentenceTransformer(args.model)
+    model.encode(texts[:32])  # lazy init is not billed to the baseline
+
+    start = time.perf_counter()
+    baseline = model.encode(texts, show_progress_bar=False)
+    base_secs = time.perf_counter() - start
+    print(f"{len(texts)} sentences, model {args.model}")
+    print(f"{'mode':<22} {'seconds':>9} {'sent/s':>10} {'speed-up':>9} {'max |dv|':>10}")
+    print(f"{'single process':<22} {base_secs:>9.2f} {len(texts) / base_secs:>10.0f} {'1.0x':>9} {0.0:>10.2e}")
+
+    reference = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        out = encode_parallel(
+            texts, args.model, workers=workers, torch_threads=args.torch_threads,
+            tokenizer=getattr(model, "tokenizer", None),
+            max_length=getattr(model, "max_seq_length", None),
+            tokens_per_batch=args.tokens_per_batch, progress=False,
+        )
+        secs = time.perf_counter() - start
+        # Batches are planned independently of the worker count
+        if reference is None:
+            reference = out
+        assert np.array_equal(out, reference), "output depends on worker count"
+        err = float(np.max(np.abs(out - baseline)))
+        label = f"{workers} workers x {args.torch_threads}"
+        print(f"{label:<22} {secs:>9.2f} {len(texts) / secs:>10.0f} {base_secs / secs:>8.1f}x {err:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
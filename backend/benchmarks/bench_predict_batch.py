@@ -0,0 +1,77 @@
+"""
+Benchmark: per-item CVEPredictor.predict loop vs. vectorized predict_batch.
+
+Run from the backend folder:
+    python benchmarks/bench_predict_batch.py --n 1000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from ml.step_6_prediction import CVEPredictor
+
+DATA_PATH = os.path.join(BACKEND_DIR, "ml", "data", "cve_part_1.json")
+MODEL_DIR = os.path.join(BACKEND_DIR, "ml", "models")
+
+
+def load_items(n):
+    with open(DATA_PATH, "r", encoding="utf-8") as file:
+        records = json.load(file)
+    items = []
+    while len(items) < n:
+        for record in records:
+            if len(items) >= n:
+                break
+            items.append({
+                "cve_id": record["cve_id"],
+                "cvss_score": record.get("cvss") or 5.0,
+                "description": record.get("description") or "",
+                "product": record.get("product") or "unknown",
+            })
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=1000, help="number of CVEs to score")
+    parser.add_argument("--batch-size", type=int, default=64, help="transformer encode batch size")
+    args = parser.parse_args()
+
+    # Embedding cache disabled so both paths pay for the transformer
+    predictor = CVEPredictor(model_dir=MODEL_DIR, cache_size=0)
+    items = load_items(args.n)
+
+    # Warm up both paths so model lazy-init is not billed to either side
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.predict(**items[0])
+    predictor.predict_batch(items[:8], batch_size=args.batch_size)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loop_results = [predictor.predict(**item) for item in items]
+    loop_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = predictor.predict_batch(items, batch_size=args.batch_size)
+    batch_secs = time.perf_counter() - start
+
+    max_diff = max(
+        abs(a["risk_score"] - b["risk_score"]) for a, b in zip(loop_results, batch_results)
+    )
+
+    print(f"CVEs scored:        {len(items)}")
+    print(f"Per-item loop:      {loop_secs:8.2f}s  ({len(items) / loop_secs:8.1f} CVE/s)")
+    print(f"predict_batch:      {batch_secs:8.2f}s  ({len(items) / batch_secs:8.1f} CVE/s)")
+    print(f"Speed-up:           {loop_secs / batch_secs:8.1f}x")
+    print(f"Max risk_score diff: {max_diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
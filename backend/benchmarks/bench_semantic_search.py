@@ -0,0 +1,97 @@
+"""
+Benchmark: semantic CVE search query latency at 100k and 1M vectors.
+
+Builds synthetic 384-d indexes (clustered like real sentence embeddings)
+in a temporary directory and times exact blocked cosine search against the
+IVF index, reporting recall@10 of IVF against exact. Needs roughly
+1.6 GB of free disk for the 1M index.
+
+Run from the backend folder:
+    python benchmarks/bench_semantic_search.py
+    python benchmarks/bench_semantic_search.py --sizes 100000 --nprobe 8 16 32
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from semantic_search import BLOCK_ROWS, VectorIndex, _normalize
+
+DIM = 384
+
+
+def _noisy(centres, scale, rng):
+    # Noise with norm ~scale around unit centres (same-topic cosine ~0.5 at scale 1)
+    return centres + scale * rng.standard_normal(centres.shape).astype(np.float32) / np.sqrt(DIM)
+
+
+def synthetic_corpus(path, n, n_topics=2000, seed=0):
+    """Topic centres plus noise, written block by block into a memmap."""
+    rng = np.random.default_rng(seed)
+    topics = _normalize(rng.standard_normal((n_topics, DIM)))
+    out = np.memmap(path, dtype=np.float32, mode="w+", shape=(n, DIM))
+    for start in range(0, n, BLOCK_ROWS):
+        rows = min(BLOCK_ROWS, n - start)
+        out[start:start + rows] = _noisy(topics[rng.integers(0, n_topics, rows)], 1.0, rng)
+    out.flush()
+    return out, topics
+
+
+def time_queries(index, queries, k, nprobe):
+    timings, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(index.search(q, k=k, nprobe=nprobe))
+        timings.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(timings), np.percentile(timings, 95), results
+
+
+def recall(exact, approx):
+    hits = [len({c for c, _ in a} & {c for c, _ in e}) / max(len(e), 1) for e, a in zip(exact, approx)]
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print(f"{'vectors':>9} {'mode':<14} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            raw, topics = synthetic_corpus(os.path.join(workdir, "raw.f32"), n)
+            ids = [f"CVE-{i}" for i in range(n)]
+            # Queries are paraphrase-like: near a topic, not copies of a row
+            queries = _normalize(_noisy(topics[rng.integers(0, len(topics), args.queries)], 0.8, rng))
+
+            n_lists = int(4 * np.sqrt(n))
+            start = time.perf_counter()
+            VectorIndex.write(os.path.join(workdir, "index"), raw, ids, ivf_lists=n_lists)
+            build_s = time.perf_counter() - start
+            del raw
+            index = VectorIndex(os.path.join(workdir, "index"))
+
+            index.search(queries[0], k=args.k, nprobe=0)  # fault the file into the page cache
+            p50, p95, exact = time_queries(index, queries, args.k, nprobe=0)
+            print(f"{n:>9} {'exact':<14} {p50:>8.2f} {p95:>8.2f} {1.0:>9.3f}")
+            for nprobe in args.nprobe:
+                p50, p95, approx = time_queries(index, queries, args.k, nprobe=nprobe)
+                label = f"ivf{n_lists}/p{nprobe}"
+                print(f"{n:>9} {label:<14} {p50:>8.2f} {p95:>8.2f} {recall(exact, approx):>9.3f}")
+            print(f"{'':>9} (index build incl. k-means: {build_s:.1f} s)")
+            del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: sklearn predict_proba vs. the compiled NumPy tree evaluator.
+
+Run from the backend folder:
+    python benchmarks/bench_tree_ensemble.py
+    python benchmarks/bench_tree_ensemble.py --model ml/models/random_forest.pkl
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from ml.tree_ensemble import CompiledTreeEnsemble
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+MODEL_DIR = os.path.join(BACKEND_DIR, "ml", "models")
+BATCH_SIZES = (1, 64, 4096)
+
+
+def load_model(path):
+    if path:
+        return path, joblib.load(path)
+    # Same fallback order as CVEPredictor
+    for name in ("gradient_boosting.pkl", "random_forest.pkl"):
+        candidate = os.path.join(MODEL_DIR, name)
+        try:
+            return candidate, joblib.load(candidate)
+        except Exception as e:
+            print(f"Skipping {name}: {e}")
+    raise SystemExit("No tree ensemble model could be loaded")
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", help="path to a fitted .pkl (default: CVEPredictor's choice)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    path, model = load_model(args.model)
+    compiled = CompiledTreeEnsemble.from_estimator(model)
+    rng = np.random.default_rng(42)
+
+    print(f"Model: {os.path.basename(path)} ({type(model).__name__}, "
+          f"{compiled.n_trees} trees, depth {compiled.max_depth}, {compiled.n_features_in_} features)")
+    print(f"{'batch':>6} {'sklearn ms':>12} {'compiled ms':>12} {'speed-up':>9} {'max |dp|':>10}")
+
+    for batch in BATCH_SIZES:
+        X = rng.standard_normal((batch, compiled.n_features_in_))
+        sk = best_of(lambda: model.predict_proba(X), args.repeats)
+        cp = best_of(lambda: compiled.predict_proba(X), args.repeats)
+        err = compiled.max_abs_error(model, X)
+        print(f"{batch:>6} {sk * 1e3:>12.3f} {cp * 1e3:>12.3f} {sk / cp:>8.1f}x {err:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Conditional GET for polled feeds.
+
+Per feed URL we remember the ETag and Last-Modified validators and a hash
+of the last body. The next poll sends If-None-Match / If-Modified-Since; a
+304 means "unchanged" without a body. Servers that ignore validators (or
+rotate them) still send the full body, so it is hashed and compared as
+well. RSS <lastBuildDate> is left out of the hash because feed generators
+such as Google News refresh it on every request.
+
+`fetch()` returns the body text only when the feed changed, None otherwise,
+so callers skip parsing, classification and DB work on idle polls. Any
+other status raises httpx.HTTPStatusError. The validators and hash of a
+changed body are held back until the caller reports that its items were
+stored with `commit(url)`; until then (or after `forget(url)`) the next
+poll fetches and returns the full body again, so a failed ingest is retried.
+"""
+import hashlib
+import re
+from typing import Optional
+
+import httpx
+
+_VOLATILE_RE = re.compile(rb"<lastBuildDate>.*?</lastBuildDate>", re.S)
+
+
+class FeedCache:
+    def __init__(self):
+        self._entries = {}  # url -> {"etag", "last_modified", "body_hash"}
+        self._pending = {}  # url -> entry of a body handed out but not yet committed
+
+        self.changed = 0
+        self.not_modified = 0
+        self.same_body = 0
+        self.errors = 0
+
+    def _request_headers(self, url):
+        entry = self._entries.get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def fetch(self, client: httpx.AsyncClient, url: str, timeout: float, headers=None) -> Optional[str]:
+        """Body text if the feed changed since the last committed fetch, else None."""
+        resp = await client.get(url, headers={**(headers or {}), **self._request_headers(url)}, timeout=timeout)
+        if resp.status_code == 304:
+            self.not_modified += 1
+            return None
+        if resp.status_code != 200:
+            self.errors += 1
+            raise httpx.HTTPStatusError(f"HTTP {resp.status_code} from {url}", request=resp.request, response=resp)
+
+        entry = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "body_hash": hashlib.sha256(_VOLATILE_RE.sub(b"", resp.content)).hexdigest(),
+        }
+        previous = self._entries.get(url)
+        if previous and previous["body_hash"] == entry["body_hash"]:
+            # Same content as a body whose items are already stored
+            self._entries[url] = entry
+            self.same_body += 1
+            return None
+        self._pending[url] = entry
+        self.changed += 1
+        return resp.text
+
+    def commit(self, url):
+        """Marks the body last returned for `url` as stored, so later polls can skip it."""
+        entry = self._pending.pop(url, None)
+        if entry is not None:
+            self._entries[url] = entry
+
+    def forget(self, url):
+        self._entries.pop(url, None)
+        self._pending.pop(url, None)
+
+    def stats(self):
+        return {
+            "feeds": len(self._entries),
+            "changed": self.changed,
+            "not_modified": self.not_modified,
+            "same_body": self.same_body,
+            "errors": self.errors,
+            "uncommitted": len(self._pending),
+        }
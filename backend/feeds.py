@@ -0,0 +1,292 @@
+"""
+Feed-source registry and scheduler for incident ingestion.
+
+Sources are declared in FEEDS_FILE (default backend/feeds.json):
+
+    {
+      "defaults": {"interval_s": 300, "timeout_s": 10, ...},
+      "sources": [
+        {"name": "google-news", "type": "rss", "urls": [...], "interval_s": 30},
+        {"name": "urlhaus-recent", "type": "csv", "url": "...", "enabled": false,
+         "columns": [...], "fields": {"title": "URLhaus: {threat} at {url}", ...}}
+      ]
+    }
+
+Types: "rss" and "atom" (parsed by feedparser), "json" (records found at
+`items_path`, a dotted path into the document) and "csv" (header row, or
+explicit `columns`; lines starting with `comment_prefix` are skipped). For
+json/csv, `fields` maps each incident field (title, link, description,
+published_at, source) to a str.format template over the record; rss/atom
+entries map themselves unless `fields` overrides them.
+
+Per source: interval_s, timeout_s (whole fetch), concurrency (parallel URLs
+of that source), max_items per URL, verify_tls, headers, origin. A source
+that yields nothing new (or fails) backs off exponentially, up to
+max_backoff_s, and returns to interval_s as soon as it produces a new row.
+Timeouts, statuses other than 200/304, parse errors and ingest errors all
+count as failures and make the URL's next fetch unconditional, so items
+that were not stored are picked up again.
+
+All sources share one fetch pool of FEED_FETCH_CONCURRENCY requests and one
+ingest callback (the bulk insert in routers/cyber_incidents). Each due
+source runs as its own task, so a slow feed never delays the others.
+"""
+import asyncio
+import csv
+import json
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import feedparser
+
+from feed_cache import FeedCache
+from http_client import get_client
+
+FEEDS_FILE = os.getenv("FEEDS_FILE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "feeds.json")
+FEED_FETCH_CONCURRENCY = int(os.getenv("FEED_FETCH_CONCURRENCY", "8"))
+
+SOURCE_DEFAULTS = {
+    "enabled": True,
+    "interval_s": 300,
+    "timeout_s": 10.0,
+    "concurrency": 2,
+    "max_backoff_s": 3600,
+    "max_items": None,
+    "verify_tls": True,
+    "headers": {},
+    "fields": {},
+    "items_path": "",
+    "columns": None,
+    "comment_prefix": None,
+}
+SOURCE_TYPES = ("rss", "atom", "json", "csv")
+
+
+class _Record(dict):
+    def __missing__(self, key):
+        return ""
+
+
+def _render(template: str, record: dict) -> str:
+    return template.format_map(_Record(record)).strip()
+
+
+def parse_date(value) -> datetime:
+    """RFC 822 or ISO 8601 string → naive UTC datetime; now if unparseable."""
+    parsed = None
+    if value:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            try:
+                parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+            except ValueError:
+                pass
+    if parsed is None:
+        return datetime.utcnow()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class FeedSource:
+    def __init__(self, config: dict, defaults: Optional[dict] = None):
+        cfg = {**SOURCE_DEFAULTS, **(defaults or {}), **config}
+        if cfg.get("type") not in SOURCE_TYPES:
+            raise ValueError(f"feed source {cfg.get('name')!r}: type must be one of {SOURCE_TYPES}")
+        self.name = cfg["name"]
+        self.type = cfg["type"]
+        self.urls = cfg.get("urls") or [cfg["url"]]
+        self.enabled = bool(cfg["enabled"])
+        self.interval_s = float(cfg["interval_s"])
+        self.timeout_s = float(cfg["timeout_s"])
+        self.max_backoff_s = max(self.interval_s, float(cfg["max_backoff_s"]))
+        self.max_items = cfg["max_items"]
+        self.verify_tls = bool(cfg["verify_tls"])
+        self.headers = cfg["headers"]
+        self.fields = cfg["fields"]
+        self.items_path = cfg["items_path"]
+        self.columns = cfg["columns"]
+        self.comment_prefix = cfg["comment_prefix"]
+        self.origin = cfg.get("origin") or self.name
+        self.source = cfg.get("source") or self.name
+        self.limit = asyncio.Semaphore(max(1, int(cfg["concurrency"])))
+
+        self.next_due = 0.0
+        self.idle_cycles = 0
+        self.running = False
+        self.runs = 0
+        self.new_rows = 0
+        self.last_new = 0
+        self.errors = 0
+        self.last_error = None
+
+    # ── Parsing ────────────────────────────────────────────────────────────
+
+    def parse(self, body: str) -> List[Dict]:
+        if self.type in ("rss", "atom"):
+            items = [self._from_entry(entry) for entry in feedparser.parse(body).entries[:self.max_items]]
+        else:
+            records = self._json_records(body) if self.type == "json" else self._csv_records(body)
+            items = [self._from_record(record) for record in records[:self.max_items]]
+        return [item for item in items if item["link"]]
+
+    def _from_entry(self, entry) -> Dict:
+        if self.fields:
+            return self._from_record(dict(entry))
+        return {
+            "title": entry.get("title", ""),
+            "source": entry.source.title if hasattr(entry, "source") and entry.source.get("title") else self.source,
+            "link": entry.get("link", ""),
+            "description": entry.get("summary") or entry.get("description") or "",
+            "origin": self.origin,
+            "published_at": parse_date(entry.get("published") or entry.get("updated")),
+        }
+
+    def _from_record(self, record: dict) -> Dict:
+        fields = self.fields
+        return {
+            "title": _render(fields.get("title", "{title}"), record),
+            "source": _render(fields.get("source", ""), record) or self.source,
+            "link": _render(fields.get("link", "{link}"), record),
+            "description": _render(fields.get("description", "{description}"), record),
+            "origin": self.origin,
+            "published_at": parse_date(_render(fields.get("published_at", "{published}"), record)),
+        }
+
+    def _json_records(self, body: str) -> List[dict]:
+        data = json.loads(body)
+        for key in filter(None, self.items_path.split(".")):
+            data = data[key]
+        return [record for record in data if isinstance(record, dict)]
+
+    def _csv_records(self, body: str) -> List[dict]:
+        lines = body.splitlines()
+        if self.comment_prefix:
+            lines = [line for line in lines if not line.startswith(self.comment_prefix)]
+        return list(csv.DictReader(lines, fieldnames=self.columns, skipinitialspace=True))
+
+    # ── Scheduling ─────────────────────────────────────────────────────────
+
+    def finished(self, now: float, new_rows: int, error: Optional[str] = None):
+        self.runs += 1
+        self.last_new = new_rows
+        self.new_rows += new_rows
+        if error:
+            self.errors += 1
+            self.last_error = error
+        self.idle_cycles = 0 if new_rows else self.idle_cycles + 1
+        delay = min(self.max_backoff_s, self.interval_s * 2 ** min(self.idle_cycles, 16))
+        self.next_due = now + delay
+
+    def stats(self, now: float) -> Dict:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "enabled": self.enabled,
+            "running": self.running,
+            "interval_s": self.interval_s,
+            "next_run_in_s": round(max(0.0, self.next_due - now), 1) if self.enabled else None,
+            "idle_cycles": self.idle_cycles,
+            "runs": self.runs,
+            "new_rows": self.new_rows,
+            "last_new": self.last_new,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+def load_sources(path: str = FEEDS_FILE) -> List[FeedSource]:
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    defaults = config.get("defaults", {})
+    sources = [FeedSource(source, defaults) for source in config.get("sources", [])]
+    names = [s.name for s in sources]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"duplicate feed source names in {path}: {sorted(duplicates)}")
+    return sources
+
+
+class FeedEngine:
+    def __init__(self, sources: List[FeedSource], ingest: Callable[[List[Dict]], Awaitable[int]],
+                 pool_size: int = FEED_FETCH_CONCURRENCY, cache: Optional[FeedCache] = None,
+                 clock=time.monotonic):
+        self.sources = sources
+        self.ingest = ingest
+        self.cache = cache or FeedCache()
+        self.pool_size = max(1, pool_size)
+        self.pool = asyncio.Semaphore(self.pool_size)
+        self._clock = clock
+        self._tasks = set()
+
+    def due(self) -> List[FeedSource]:
+        now = self._clock()
+        return [s for s in self.sources if s.enabled and not s.running and s.next_due <= now]
+
+    def run_due(self) -> List[str]:
+        """Starts every due source in its own task; returns their names without waiting."""
+        started = []
+        for source in self.due():
+            source.running = True
+            task = asyncio.create_task(self.run_source(source))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started.append(source.name)
+        return started
+
+    async def run_source(self, source: FeedSource) -> int:
+        source.running = True
+        new_rows, error = 0, None
+        try:
+            batches = await asyncio.gather(*(self._fetch(source, url) for url in source.urls),
+                                           return_exceptions=True)
+            items, fetched = [], []
+            for url, batch in zip(source.urls, batches):
+                if isinstance(batch, BaseException):
+                    # Timeouts, non-200/304 statuses and parse errors: refetch in full next time
+                    self.cache.forget(url)
+                    error = f"{url}: {type(batch).__name__}" + (f": {batch}" if str(batch) else "")
+                    print(f"Feed {source.name} failed: {error}")
+                else:
+                    items.extend(batch)
+                    fetched.append(url)
+            try:
+                if items:
+                    new_rows = await self.ingest(items)
+            except Exception:
+                for url in fetched:
+                    self.cache.forget(url)
+                raise
+            for url in fetched:
+                self.cache.commit(url)
+        except Exception as e:
+            error = f"ingest: {e}"
+            print(f"Feed {source.name} ingest failed: {e}")
+        finally:
+            source.running = False
+            source.finished(self._clock(), new_rows, error)
+        return new_rows
+
+    async def _fetch(self, source: FeedSource, url: str) -> List[Dict]:
+        async with source.limit, self.pool:
+            body = await asyncio.wait_for(
+                self.cache.fetch(get_client(verify=source.verify_tls), url,
+                                 timeout=source.timeout_s, headers=source.headers),
+                timeout=source.timeout_s,
+            )
+        if body is None:
+            return []  # unchanged since the last poll
+        return await asyncio.to_thread(source.parse, body)
+
+    def stats(self) -> Dict:
+        now = self._clock()
+        return {
+            "pool_size": self.pool_size,
+            "running_sources": len(self._tasks),
+            "sources": [s.stats(now) for s in self.sources],
+            "http": self.cache.stats(),
+        }
@@ -0,0 +1,69 @@
+"""
+App-scoped outbound HTTP client.
+
+Every router used to open a fresh httpx.AsyncClient per call, paying a new
+TCP + TLS handshake for each NVD, VirusTotal, AbuseIPDB, Safe Browsing,
+PhishTank, ip-api and Google News request. The clients here are created at
+startup and closed at shutdown; httpx keeps one keep-alive connection pool
+per origin inside each client, so repeat calls to the same host reuse a warm
+connection (and multiplex over it when HTTP/2 is negotiated).
+
+Call sites keep their own per-request timeouts:
+    res = await get_client().get(url, timeout=6.0)
+"""
+import os
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx only needs it to be importable)
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1").lower() in ("1", "true", "yes") and HAS_H2
+
+# verify is a client-level setting in httpx, so the Google News fetcher's
+# verify=False gets its own pool rather than weakening the shared one
+_clients: dict[bool, httpx.AsyncClient] = {}
+
+
+def _new_client(verify: bool) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED,
+        verify=verify,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S),
+    )
+
+
+def get_client(verify: bool = True) -> httpx.AsyncClient:
+    """
+    Returns the shared client. Created on first use if the app startup hook
+    has not run (scripts, benchmarks).
+    """
+    client = _clients.get(verify)
+    if client is None or client.is_closed:
+        client = _clients[verify] = _new_client(verify)
+    return client
+
+
+async def start_http_clients():
+    get_client(verify=True)
+
+
+async def close_http_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
@@ -0,0 +1,210 @@
+"""
+Rule-driven severity / sector classification for incidents.
+
+Rules live in CLASSIFIER_RULES_FILE (default backend/incident_rules.json):
+
+    {
+      "severity": {"default": "Low", "rules": [
+          {"label": "High", "keywords": ["ransomware", "breach*"], "origins": ["URLHaus"]},
+          ...]},
+      "sector": {"default": "General", "rules": [...]}
+    }
+
+Within a dimension the first matching rule wins, so rules are listed in
+priority order. Keywords match whole words only ("nic" no longer fires on
+"clinic"); a trailing "*" matches any word continuation ("bank*" covers
+"banks" and "banking"). Keywords of several words or with punctuation
+("attack confirmed", "gov.in") are phrases. `origins` matches the item's
+feed origin exactly.
+
+A text is normalised in one C pass (bytes.translate lowercases ASCII and
+turns punctuation into spaces) and scanned once by a single compiled
+regex: every keyword, wildcard and phrase head goes into one alternation,
+factored into a trie, anchored on the space before a word and extended to
+the end of that word and of any phrase continuing it. Each match is
+looked up in a memo of match -> rule mask, so the scan cost depends on
+the text, not on the keyword count. Every rule is one bit of an int,
+matches OR together into a mask, and the labels of a mask are memoised.
+Nothing mutable is shared between calls apart from those memos, whose
+values depend only on their key, so concurrent classify() calls from
+worker threads are safe.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Tuple
+
+CLASSIFIER_RULES_FILE = os.getenv("CLASSIFIER_RULES_FILE") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "incident_rules.json"
+)
+DIMENSIONS = ("severity", "sector")
+
+# ASCII letters, digits and "_" stay (A-Z folded to a-z), as do UTF-8 bytes of
+# non-ASCII letters; all other ASCII bytes become a word break
+_BYTE_TABLE = bytes(
+    c + 32 if 65 <= c <= 90 else c if (chr(c).isalnum() or c == 95 or c >= 128) else 32
+    for c in range(256)
+)
+# Non-ASCII punctuation common in news text and non-ASCII spaces, also a word break
+_UNICODE_BREAKS = "\u2018\u2019\u201c\u201d\u2013\u2014\u2026\u00ab\u00bb"
+_UNICODE_BREAKS += "".join(chr(c) for c in range(128, 0x3001) if chr(c).isspace())
+_UNICODE_TABLE = str.maketrans(_UNICODE_BREAKS, " " * len(_UNICODE_BREAKS))
+_MAX_MEMO = 65536  # bound on memoised mask -> labels entries
+_MAX_MATCHES = 200000  # bound on memoised match -> mask entries
+
+
+def normalize(text: str) -> str:
+    """Lowercased text with every word break turned into a space."""
+    return _normalized(text).decode("utf-8")
+
+
+def _normalized(text: str) -> bytes:
+    """normalize() as UTF-8, which the matcher scans without decoding."""
+    if not text.isascii():
+        text = text.lower().translate(_UNICODE_TABLE)
+    return text.encode("utf-8").translate(_BYTE_TABLE)
+
+
+def split_words(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def _alternation(stems: List[str], endings: Dict[str, str], depth: int = 0) -> str:
+    """Regex for any of `stems` (none a prefix of another) and its ending, factored into a trie."""
+    branches = {}
+    for stem in stems:
+        branches.setdefault(stem[depth], []).append(stem)
+    parts = []
+    for ch, group in sorted(branches.items()):
+        if len(group) == 1:
+            parts.append(re.escape(group[0][depth:]) + endings[group[0]])
+        else:
+            parts.append(re.escape(ch) + _alternation(group, endings, depth + 1))
+    return parts[0] if len(parts) == 1 else "(?:" + "|".join(parts) + ")"
+
+
+class IncidentClassifier:
+    def __init__(self, rules: Dict):
+        self.defaults = {}
+        self.labels = {}          # dimension -> [label by rule index]
+        self._spans = []          # (dimension, first bit, rule count) per dimension
+        self._origin_masks = {}   # origin -> mask
+        self._exact = {}          # word -> mask
+        self._prefixes = []       # [(prefix, mask)]
+        self._phrases = {}        # first word -> [(" w1 w2 ", mask)]; wildcard phrases lack the trailing space
+        self._matches = {}        # b" word[ phrase continuation]" -> mask
+        self._memo = {}           # mask -> (severity, sector)
+
+        bit = 0
+        for dim in DIMENSIONS:
+            config = rules[dim]
+            self.defaults[dim] = config["default"]
+            self.labels[dim] = [rule["label"] for rule in config["rules"]]
+            self._spans.append((dim, bit, len(config["rules"])))
+            for rule in config["rules"]:
+                mask = 1 << bit
+                bit += 1
+                for origin in rule.get("origins", []):
+                    self._origin_masks[origin] = self._origin_masks.get(origin, 0) | mask
+                for keyword in rule.get("keywords", []):
+                    wildcard = keyword.strip().endswith("*")
+                    words = split_words(keyword.strip().rstrip("*"))
+                    if not words:
+                        raise ValueError(f"empty keyword {keyword!r}")
+                    if len(words) > 1:
+                        phrase = " " + " ".join(words) + ("" if wildcard else " ")
+                        self._phrases.setdefault(words[0], []).append((phrase, mask))
+                    elif wildcard:
+                        self._prefixes.append((words[0], mask))
+                    else:
+                        self._exact[words[0]] = self._exact.get(words[0], 0) | mask
+
+        # One alternation over every keyword, wildcard and phrase head; a word
+        # extending another is folded into it, and the match then runs to the
+        # end of the word
+        stems, stem_of, folded = [], {}, set()
+        for word in sorted({*self._exact, *(prefix for prefix, _ in self._prefixes), *self._phrases}):
+            if stems and word.startswith(stems[-1]):
+                folded.add(stems[-1])
+            else:
+                stems.append(word)
+            stem_of[word] = stems[-1]
+        wildcards = {prefix for prefix, _ in self._prefixes}
+        endings = {stem: r"\S*" if stem in wildcards or stem in folded else r"(?!\S)" for stem in stems}
+        # A phrase head's match also takes in the rest of any phrase, longest
+        # first, so one match covers every phrase starting at that word
+        phrases = sorted({phrase for entries in self._phrases.values() for phrase, _ in entries},
+                         key=lambda phrase: -phrase.count(" "))
+        tails = {}
+        for phrase in phrases:
+            words = phrase.split()
+            tails.setdefault(stem_of[words[0]], []).append(
+                "".join(" +" + re.escape(word) for word in words[1:])
+                + (r"(?!\S)" if phrase.endswith(" ") else r"\S*"))
+        for stem, alternatives in tails.items():
+            endings[stem] += "(?:" + "|".join(alternatives) + ")?"
+        self._scan = re.compile((" " + _alternation(stems, endings) if stems else "(?!)").encode("utf-8")).findall
+        # Words a match swallows as a phrase continuation are not rescanned, so
+        # a phrase starting on one of them needs the slower check in _mask()
+        self._chained = any(
+            head == word or (i == len(phrase.split()) - 1 and not phrase.endswith(" ") and head.startswith(word))
+            for phrase in phrases for i, word in enumerate(phrase.split()) if i
+            for head in self._phrases
+        )
+
+    @classmethod
+    def from_file(cls, path: str = CLASSIFIER_RULES_FILE) -> "IncidentClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _match_mask(self, match: bytes) -> int:
+        words = match.decode("utf-8").split()
+        mask = 0
+        for i, word in enumerate(words):
+            mask |= self._exact.get(word, 0)
+            for prefix, bit in self._prefixes:
+                if word.startswith(prefix):
+                    mask |= bit
+            if word in self._phrases:
+                text = " " + " ".join(words[i:]) + " "
+                for phrase, bit in self._phrases[word]:
+                    if text.startswith(phrase):
+                        mask |= bit
+        if len(self._matches) < _MAX_MATCHES:
+            self._matches[match] = mask
+        return mask
+
+    def _mask(self, text: bytes) -> int:
+        mask = 0
+        matches = self._matches
+        for match in self._scan(text):
+            bits = matches.get(match)
+            mask |= self._match_mask(match) if bits is None else bits
+        if self._chained:
+            collapsed = " " + " ".join(text.decode("utf-8").split()) + " "
+            for entries in self._phrases.values():
+                for phrase, bit in entries:
+                    if phrase in collapsed:
+                        mask |= bit
+        return mask
+
+    def _labels(self, mask: int) -> Tuple[str, str]:
+        labels = []
+        for dim, first, count in self._spans:
+            rules = (mask >> first) & ((1 << count) - 1)
+            # Lowest set bit = highest-priority matching rule
+            labels.append(self.labels[dim][(rules & -rules).bit_length() - 1] if rules else self.defaults[dim])
+        labels = labels[0], labels[1]
+        if len(self._memo) < _MAX_MEMO:
+            self._memo[mask] = labels
+        return labels
+
+    def classify(self, title: str, description: str = "", origin: str = "") -> Tuple[str, str]:
+        """(severity, sector) for one item."""
+        mask = self._mask(_normalized(f" {title} {description}")) | self._origin_masks.get(origin, 0)
+        return self._memo.get(mask) or self._labels(mask)
+
+    def classify_batch(self, items: Iterable[Tuple[str, str, str]]) -> List[Tuple[str, str]]:
+        """(severity, sector) for each (title, description, origin), e.g. for backfills."""
+        classify = self.classify
+        return [classify(title, description, origin) for title, description, origin in items]
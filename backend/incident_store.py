@@ -0,0 +1,136 @@
+"""
+Bulk ingestion of feed incidents.
+
+Feed syncs see mostly links that are already stored. Instead of one
+INSERT + commit per item (with an IntegrityError rollback for every
+duplicate), callers:
+
+    1. hash every link up front (`link_hash`),
+    2. drop the ones already stored with one indexed IN query per
+       IN_CHUNK hashes (`existing_link_hashes`),
+    3. insert the rest in a single statement that ignores link_hash
+       conflicts (`insert_incidents`), so a row inserted concurrently by
+       another worker is skipped rather than failing the batch.
+
+The conflict clause is dialect-native: ON CONFLICT DO NOTHING on SQLite
+and PostgreSQL, ON DUPLICATE KEY UPDATE id=id on MySQL (unlike INSERT
+IGNORE, it does not also swallow truncation and other data errors).
+MySQL has no RETURNING, so there the statement runs once per row and
+LAST_INSERT_ID tells an inserted row from a skipped one.
+"""
+import hashlib
+from typing import Iterable, List, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Incident
+
+IN_CHUNK = 500   # bound parameters per IN query (SQLite builds < 3.32 allow 999)
+
+
+def migrate_incidents_table(engine):
+    """
+    Adds columns introduced after the table was first created, which
+    create_all() does not do for existing tables. Safe to run on every start.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns(Incident.__tablename__)}
+    if "cluster_id" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE incidents ADD COLUMN cluster_id INTEGER"))
+            conn.execute(text("CREATE INDEX ix_incidents_cluster_id ON incidents (cluster_id)"))
+
+
+def link_hash(link: str) -> str:
+    return hashlib.sha256(link.encode("utf-8")).hexdigest()
+
+
+def existing_link_hashes(db: Session, hashes: Iterable[str]) -> Set[str]:
+    hashes = list(dict.fromkeys(hashes))
+    found = set()
+    for i in range(0, len(hashes), IN_CHUNK):
+        chunk = hashes[i:i + IN_CHUNK]
+        found.update(h for (h,) in db.query(Incident.link_hash).filter(Incident.link_hash.in_(chunk)))
+    return found
+
+
+def existing_ids(db: Session, ids: Iterable[int]) -> Set[int]:
+    ids = list(dict.fromkeys(ids))
+    found = set()
+    for i in range(0, len(ids), IN_CHUNK):
+        found.update(row_id for (row_id,) in db.query(Incident.id).filter(Incident.id.in_(ids[i:i + IN_CHUNK])))
+    return found
+
+
+def _insert_ignoring_duplicates(dialect: str):
+    """INSERT statement that skips link_hash conflicts, or None if the dialect has no such clause."""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert(Incident).on_conflict_do_nothing(index_elements=["link_hash"])
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert(Incident).on_conflict_do_nothing(index_elements=["link_hash"])
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        return dialect_insert(Incident).on_duplicate_key_update(id=Incident.id)
+    return None
+
+
+def insert_incidents(db: Session, rows: List[dict], commit: bool = True) -> List[Incident]:
+    """
+    Inserts `rows` (Incident column dicts with unique link_hash values) in
+    one batch and commits, unless `commit` is False so the caller can make
+    more changes in the same transaction. Returns the rows actually
+    inserted, in input order, loaded with their ids and created_at.
+    """
+    if not rows:
+        return []
+    dialect = db.get_bind().dialect
+    stmt = _insert_ignoring_duplicates(dialect.name)
+    if stmt is None:
+        # Unknown backend: plain per-row inserts, each in a savepoint
+        return _insert_one_by_one(db, rows, commit)
+
+    if dialect.insert_returning:
+        # Skipped conflicts return nothing
+        new_ids = [row_id for (row_id,) in db.execute(stmt.returning(Incident.id), rows)]
+    else:
+        # No RETURNING (MySQL): one statement per row. An ON DUPLICATE KEY
+        # UPDATE that only meets an existing row leaves LAST_INSERT_ID at 0,
+        # so a row another worker inserted since our existence check is not
+        # reported as ours. (A multi-row insert's id range is not reliable:
+        # ids may interleave with other writers.)
+        conn = db.connection()
+        new_ids = [row_id for row_id in (conn.execute(stmt, row).lastrowid for row in rows) if row_id]
+    if commit:
+        db.commit()
+    # Order is restored by hash
+    by_hash = {i.link_hash: i for i in _load(db, Incident.id, new_ids)}
+    return [by_hash[r["link_hash"]] for r in rows if r["link_hash"] in by_hash]
+
+
+def incidents_by_link_hash(db: Session, hashes: Iterable[str]) -> List[Incident]:
+    return _load(db, Incident.link_hash, list(dict.fromkeys(hashes)))
+
+
+def _load(db: Session, column, values: list) -> List[Incident]:
+    loaded = []
+    for i in range(0, len(values), IN_CHUNK):
+        loaded.extend(db.query(Incident).filter(column.in_(values[i:i + IN_CHUNK])))
+    return loaded
+
+
+def _insert_one_by_one(db: Session, rows: List[dict], commit: bool = True) -> List[Incident]:
+    inserted = []
+    for row in rows:
+        incident = Incident(**row)
+        try:
+            with db.begin_nested():
+                db.add(incident)
+            inserted.append(incident)
+        except IntegrityError:
+            pass
+    if commit:
+        db.commit()
+    return inserted
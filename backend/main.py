@@ -1,29 +1,67 @@
 import os
+from datetime import datetime
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from routers import vulnerabilities, ws, link_scanner, cyber_incidents, predict, threat_map, ai_cve_search
 from routers.cyber_incidents import sync_incidents_task
 from database import engine, Base
+from http_client import start_http_clients, close_http_clients
+from incident_store import migrate_incidents_table
+from nvd_mirror import sync_mirror_job
 
-# Create tables if they don't exist
+# Create tables if they don't exist, then add any newer columns
 Base.metadata.create_all(bind=engine)
+migrate_incidents_table(engine)
 
 app = FastAPI(title="CTIIndia Platform API", version="1.0.0")
 
+# Load the prediction model in the background at startup so /api/ready only
+# reports ready once the worker can serve /api/predict without a cold start
+PREDICT_WARMUP = os.getenv("PREDICT_WARMUP", "0").lower() in ("1", "true", "yes")
+
+# Keep the local NVD mirror current (0 disables the job; the mirror is still
+# searched if it exists, e.g. after `python nvd_mirror.py sync`)
+NVD_MIRROR_SYNC_MINUTES = int(os.getenv("NVD_MIRROR_SYNC_MINUTES", "0"))
+
+# How often the scheduler checks which feed sources are due; each source's own
+# interval and backoff live in feeds.json
+FEED_SCHEDULER_TICK_S = int(os.getenv("FEED_SCHEDULER_TICK_S", "5"))
+
 # Setup Scheduler
 scheduler = AsyncIOScheduler()
 
+@app.on_event("startup")
+async def open_http_clients():
+    await start_http_clients()
+
 @app.on_event("startup")
 async def start_scheduler():
-    scheduler.add_job(sync_incidents_task, 'interval', seconds=30)
+    scheduler.add_job(sync_incidents_task, 'interval', seconds=FEED_SCHEDULER_TICK_S)
+    if NVD_MIRROR_SYNC_MINUTES > 0:
+        scheduler.add_job(sync_mirror_job, 'interval', minutes=NVD_MIRROR_SYNC_MINUTES,
+                          next_run_time=datetime.now())
     scheduler.start()
     # Trigger first run immediately
     import asyncio
     asyncio.create_task(sync_incidents_task())
 
+@app.on_event("startup")
+async def warm_up_prediction_model():
+    if PREDICT_WARMUP:
+        predict.start_predictor_warmup()
+
+@app.on_event("shutdown")
+async def stop_prediction_batcher():
+    await predict._batcher.close()
+    predict.shutdown_inference_pool()
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    await close_http_clients()
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -46,6 +84,16 @@ app.include_router(ai_cve_search.router, prefix="/api", tags=["AI CVE Search"])
 def health_check():
     return {"status": "ok", "message": "CTIIndia API is running"}
 
+@app.get("/api/ready")
+def readiness_check():
+    """Load-balancer readiness probe; 503 until the prediction model is warm."""
+    if not PREDICT_WARMUP:
+        return {"status": "ready", "warmup": "disabled"}
+    state = predict.predictor_warmup_state()
+    if state["status"] != "ready":
+        return JSONResponse(status_code=503, content={"status": "not_ready", "warmup": state})
+    return {"status": "ready", "warmup": state}
+
 # ── Serve Frontend ──────────────────────────────────────────
 _FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend")
 _FRONTEND_SRC = os.path.join(_FRONTEND, "src")
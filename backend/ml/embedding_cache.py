@@ -0,0 +1,289 @@
+"""
+Content-addressed cache for sentence embeddings.
+
+Texts are keyed by the SHA-256 of their normalized form, prefixed with the
+embedding model's "name@revision" when it is known, so the same CVE text
+scored from the UI, a re-triage job or after an NVD update is only ever run
+through the transformer once, and a model upgrade never serves stale vectors.
+
+Two tiers:
+  * an in-process LRU bounded by `capacity` entries
+  * an optional on-disk tier under `cache_dir`: a flat float32 file
+    (`embeddings.f32`, memory-mapped for reads) plus an append-only index
+    file (`index.txt`, one hash per row) and `meta.json` with the dimension
+
+The disk tier has a single writer. Processes that share a directory with a
+writer (e.g. inference pool workers) open it with read_only=True: they pick
+up the writer's new rows every `refresh_s` seconds and queue the vectors they
+compute themselves, which the writer's process collects with take_new() and
+persists with store().
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+
+MODEL_SOURCE_FILE = "source.json"
+
+def normalize_text(text):
+    # MiniLM is uncased, so case and whitespace do not change the embedding
+    return " ".join(str(text).lower().split())
+
+
+def text_key(text, model_id=None):
+    # Vectors from different models (or revisions of one) never share a key
+    normalized = normalize_text(text)
+    if model_id:
+        normalized = f"{model_id}\n{normalized}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def read_model_id(model_path):
+    """
+    "name@revision" of a locally saved embedding model, from the source.json
+    written next to it by write_model_source(); None if it has none.
+    """
+    try:
+        with open(os.path.join(model_path, MODEL_SOURCE_FILE), "r", encoding="utf-8") as f:
+            source = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return f"{source['name']}@{source['revision']}"
+
+
+def write_model_source(model_path, name, revision):
+    with open(os.path.join(model_path, MODEL_SOURCE_FILE), "w", encoding="utf-8") as f:
+        json.dump({"name": name, "revision": revision}, f)
+
+
+class _DiskTier:
+    def __init__(self, cache_dir, dim, read_only=False):
+        self.cache_dir = cache_dir
+        self.dim = dim
+        self.read_only = read_only
+        self.data_path = os.path.join(cache_dir, "embeddings.f32")
+        self.index_path = os.path.join(cache_dir, "index.txt")
+        meta_path = os.path.join(cache_dir, "meta.json")
+
+        if not read_only:
+            os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                stored_dim = json.load(f)["dim"]
+            if stored_dim != dim:
+                raise ValueError(
+                    f"Embedding cache at {cache_dir} holds dim={stored_dim}, model produces dim={dim}"
+                )
+        elif not read_only:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": dim, "dtype": "float32"}, f)
+
+        self.rows = {}
+        self._index_offset = 0  # bytes of index.txt already read
+        self._mapped = None
+        self._mapped_rows = 0
+        if not read_only and os.path.exists(self.index_path):
+            self._repair()
+        self.refresh()
+
+    def _data_rows(self):
+        return os.path.getsize(self.data_path) // (self.dim * 4) if os.path.exists(self.data_path) else 0
+
+    def _repair(self):
+        # An interrupted append can leave the index and the data file out of step
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            keys = [line.strip() for line in f if line.strip()]
+        n_rows = min(len(keys), self._data_rows())
+        if n_rows != len(keys) or n_rows != self._data_rows():
+            with open(self.data_path, "ab") as f:
+                f.truncate(n_rows * self.dim * 4)
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                f.writelines(f"{key}\n" for key in keys[:n_rows])
+
+    def refresh(self):
+        """Reads index rows appended since the last call; returns how many were added."""
+        if not os.path.exists(self.index_path):
+            return 0
+        if os.path.getsize(self.index_path) < self._index_offset:
+            # The writer repaired (truncated) the files: start over
+            self.rows = {}
+            self._index_offset = 0
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            chunk = f.read()
+        # Only complete lines, and only rows whose data is already on disk
+        room = self._data_rows() - len(self.rows)
+        lines = chunk[:chunk.rfind(b"\n") + 1].splitlines(keepends=True)[:max(0, room)]
+        before = len(self.rows)
+        for line in lines:
+            self._index_offset += len(line)
+            key = line.strip().decode("utf-8")
+            if key:
+                self.rows[key] = len(self.rows)
+        return len(self.rows) - before
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _view(self):
+        if self._mapped is None or self._mapped_rows != len(self.rows):
+            self._mapped = np.memmap(
+                self.data_path, dtype=np.float32, mode="r", shape=(len(self.rows), self.dim)
+            )
+            self._mapped_rows = len(self.rows)
+        return self._mapped
+
+    def get(self, keys):
+        """Returns {position: vector} for the keys present on disk."""
+        found = {i: self.rows[k] for i, k in enumerate(keys) if k in self.rows}
+        if not found:
+            return {}
+        view = self._view()
+        positions = list(found)
+        block = np.asarray(view[[found[p] for p in positions]])
+        return dict(zip(positions, block))
+
+    def append(self, keys, vectors):
+        if self.read_only:
+            return
+        new = [(k, v) for k, v in zip(keys, vectors) if k not in self.rows]
+        if not new:
+            return
+        block = np.ascontiguousarray(np.stack([v for _, v in new]), dtype=np.float32)
+        with open(self.data_path, "ab") as f:
+            f.write(block.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # Index is written after the data so a crash never points past the data file
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.writelines(f"{k}\n" for k, _ in new)
+            self._index_offset = f.tell()
+        start = len(self.rows)
+        for offset, (k, _) in enumerate(new):
+            self.rows[k] = start + offset
+
+
+class EmbeddingCache:
+    # Vectors queued by a read-only cache for its writer; beyond this the oldest are dropped
+    MAX_UNSAVED = 10000
+
+    def __init__(self, capacity=4096, cache_dir=None, read_only=False, refresh_s=30.0, model_id=None):
+        self.capacity = max(0, int(capacity))
+        self.cache_dir = cache_dir
+        self.model_id = model_id
+        self.read_only = read_only
+        self.refresh_s = refresh_s
+        self._memory = OrderedDict()
+        self._disk = None
+        self._refreshed_at = time.monotonic()
+        self._unsaved = OrderedDict()
+        self._lock = Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_tier(self, dim):
+        if self.cache_dir and self._disk is None:
+            self._disk = _DiskTier(self.cache_dir, dim, read_only=self.read_only)
+        return self._disk
+
+    def _remember(self, key, vector):
+        if self.capacity == 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def encode(self, texts, encoder, dim=None):
+        """
+        Returns a float32 (len(texts), dim) matrix. Only texts missing from
+        both tiers are passed to `encoder(list_of_texts)`, once each.
+        """
+        keys = [text_key(t, self.model_id) for t in texts]
+        found = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+            memory_hits = len(found)
+
+            disk = self._disk_tier(dim) if dim else self._disk
+            if disk is not None and self.read_only and time.monotonic() - self._refreshed_at >= self.refresh_s:
+                disk.refresh()
+                self._refreshed_at = time.monotonic()
+            if disk is not None and len(found) < len(keys):
+                pending = [i for i in range(len(keys)) if i not in found]
+                for pos, vector in disk.get([keys[i] for i in pending]).items():
+                    found[pending[pos]] = vector
+                    self._remember(keys[pending[pos]], vector)
+            disk_hits = len(found) - memory_hits
+
+        # Encode each distinct missing text once, outside the lock
+        missing = {}
+        for i, key in enumerate(keys):
+            if i not in found and key not in missing:
+                missing[key] = texts[i]
+        computed = {}
+        if missing:
+            vectors = np.asarray(encoder(list(missing.values())), dtype=np.float32)
+            computed = dict(zip(missing.keys(), vectors))
+
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += len(keys) - len(found)
+            if computed:
+                disk = self._disk_tier(next(iter(computed.values())).shape[0])
+                if disk is not None and self.read_only:
+                    self._unsaved.update(computed)
+                    while len(self._unsaved) > self.MAX_UNSAVED:
+                        self._unsaved.popitem(last=False)
+                elif disk is not None:
+                    disk.append(list(computed.keys()), list(computed.values()))
+                for key, vector in computed.items():
+                    self._remember(key, vector)
+
+        if not keys:
+            return np.empty((0, dim or 0), dtype=np.float32)
+        return np.stack([found[i] if i in found else computed[keys[i]] for i in range(len(keys))])
+
+    def take_new(self):
+        """(keys, vectors) computed by this read-only cache since the last call, for the writer."""
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, OrderedDict()
+        return list(unsaved.keys()), list(unsaved.values())
+
+    def store(self, keys, vectors):
+        """Appends vectors computed elsewhere (e.g. by read-only workers) to the disk tier."""
+        if not keys or self.read_only:
+            return
+        with self._lock:
+            disk = self._disk_tier(len(vectors[0]))
+            if disk is not None:
+                disk.append(keys, vectors)
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.capacity,
+                "disk_entries": len(self._disk) if self._disk is not None else 0,
+                "disk_dir": self.cache_dir,
+                "model_id": self.model_id,
+            }
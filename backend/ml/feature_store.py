@@ -0,0 +1,115 @@
+"""
+Columnar feature store for the training features produced by step 3.
+
+Layout (default: backend/ml/data/feature_store):
+
+    feature_store/
+      embeddings.npy      <- float32 (n_rows, dim), memory-mappable
+      metadata.csv        <- cve_id, cvss_normalized, exploited (row-aligned)
+      manifest.json       <- row count, dimension, embedding model, columns
+
+Compared with the 385-column final_features.csv this is roughly a quarter of
+the size on disk and loads without any text parsing: `load()` returns the
+embeddings as a read-only memmap, so slicing or feeding rows to a model does
+not copy the matrix into memory first.
+
+Usage:
+    store = FeatureStore()
+    meta, emb = store.load()           # zero-copy view of the embeddings
+    df = store.to_frame()              # same columns as final_features.csv
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'feature_store')
+
+METADATA_COLS = ['cve_id', 'cvss_normalized', 'exploited']
+FORMAT_VERSION = 1
+
+
+class FeatureStore:
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def exists(self):
+        return os.path.exists(self._path('manifest.json'))
+
+    def manifest(self):
+        with open(self._path('manifest.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write(self, metadata, embeddings, embedding_model=None):
+        """
+        Persist a feature set. Each file is written under a temporary name and
+        renamed into place, manifest last, so a reader never pairs a new
+        embedding matrix with stale metadata.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(metadata):
+            raise ValueError(
+                f"Embeddings shape {embeddings.shape} does not match {len(metadata)} metadata rows"
+            )
+        cols = [c for c in METADATA_COLS if c in metadata.columns]
+
+        os.makedirs(self.root, exist_ok=True)
+        pointer = self._path('manifest.json')
+        if os.path.exists(pointer):
+            # Invalidate first so a crash mid-write is seen as "no store"
+            os.remove(pointer)
+
+        tmp = self._path('embeddings.npy.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, embeddings)
+        os.replace(tmp, self._path('embeddings.npy'))
+
+        tmp = self._path('metadata.csv.tmp')
+        metadata[cols].reset_index(drop=True).to_csv(tmp, index=False)
+        os.replace(tmp, self._path('metadata.csv'))
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'n_rows': int(embeddings.shape[0]),
+            'dim': int(embeddings.shape[1]),
+            'dtype': 'float32',
+            'metadata_columns': cols,
+            'embedding_model': embedding_model,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        }
+        tmp = pointer + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, pointer)
+        return manifest
+
+    def metadata(self):
+        # round_trip keeps cvss_normalized bit-identical to what was written
+        return pd.read_csv(self._path('metadata.csv'), float_precision='round_trip')
+
+    def embeddings(self, mmap_mode='r'):
+        emb = np.load(self._path('embeddings.npy'), mmap_mode=mmap_mode)
+        manifest = self.manifest()
+        if emb.shape != (manifest['n_rows'], manifest['dim']):
+            raise ValueError(f"Feature store at {self.root} is inconsistent: {emb.shape} vs manifest")
+        return emb
+
+    def load(self, mmap_mode='r'):
+        """Returns (metadata DataFrame, embeddings). Embeddings are a memmap view by default."""
+        return self.metadata(), self.embeddings(mmap_mode=mmap_mode)
+
+    def to_frame(self):
+        """
+        Rebuilds the final_features.csv layout (cve_id, cvss_normalized,
+        exploited, emb_0..emb_N) for code that expects a single DataFrame.
+        This materialises one copy of the embeddings.
+        """
+        meta, emb = self.load()
+        emb_cols = [f"emb_{i}" for i in range(emb.shape[1])]
+        emb_df = pd.DataFrame(np.asarray(emb), columns=emb_cols)
+        return pd.concat([meta, emb_df], axis=1)
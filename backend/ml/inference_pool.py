@@ -0,0 +1,178 @@
+"""
+Process-pool inference for CVEPredictor.
+
+Each worker process loads the scaler, MiniLM and the classifier once (in the
+pool initializer) and then serves predict_batch calls. Classifier arrays are
+loaded with joblib's mmap_mode so the pages are shared through the OS page
+cache instead of being copied into every worker. The event loop only awaits
+a future, so the tokenizer and sklearn never hold the server's GIL.
+
+Every reply carries the worker's state (pid, model version it served, versions
+it failed to load, embedding cache counters), so stats report what the
+workers actually serve.
+
+The on-disk embedding tier (cache_dir) has one writer, this process: workers
+open it read-only, re-read its index every cache_refresh_s seconds, and send
+the embeddings they computed back with their reply for the parent to append.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+
+try:
+    from ml.embedding_cache import EmbeddingCache
+except ImportError:  # running from inside backend/ml
+    from embedding_cache import EmbeddingCache
+
+_worker_predictor = None
+
+
+def _init_worker(model_dir, cache_size, cache_dir, mmap_mode, torch_threads, classifier_backend,
+                 registry_dir, cache_refresh_s):
+    global _worker_predictor
+
+    # N workers x M intra-op threads oversubscribes the box; keep it explicit
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+    try:
+        from ml.step_6_prediction import CVEPredictor
+    except ImportError:  # running from inside backend/ml
+        from step_6_prediction import CVEPredictor
+
+    _worker_predictor = CVEPredictor(
+        model_dir=model_dir,
+        cache_size=cache_size,
+        cache_dir=cache_dir,
+        mmap_mode=mmap_mode,
+        # Workers read the on-disk embedding tier; the parent process writes it
+        cache_read_only=True,
+        cache_refresh_s=cache_refresh_s,
+        classifier_backend=classifier_backend,
+        registry_dir=registry_dir,
+    )
+
+
+def _worker_state():
+    return {
+        "pid": os.getpid(),
+        "model_version": _worker_predictor.model_version,
+        "failed_versions": dict(_worker_predictor.failed_versions),
+        "embedding_cache": _worker_predictor.embedding_cache.stats(),
+        "new_embeddings": _worker_predictor.embedding_cache.take_new(),
+    }
+
+
+def _worker_predict_batch(items, model_version=None):
+    # A new registry version loads in the background; this batch (and any
+    # batch while the load runs or after it failed) uses the current model
+    _worker_predictor.request_version(model_version)
+    predictions = _worker_predictor.predict_batch(items)
+    return _worker_state(), predictions
+
+
+def _worker_check_version(version):
+    return _worker_predictor.check_version(version)
+
+
+class InferencePool:
+    def __init__(self, model_dir, workers=None, cache_size=4096, cache_dir=None,
+                 mmap_mode='r', torch_threads=1, classifier_backend='sklearn', registry_dir=None,
+                 cache_refresh_s=30.0):
+        self.workers = workers or os.cpu_count() or 1
+        # spawn, not fork: torch and tokenizers threads do not survive a fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_dir, cache_size, cache_dir, mmap_mode, torch_threads, classifier_backend,
+                      registry_dir, cache_refresh_s),
+        )
+        self.cache_dir = cache_dir
+        self._embedding_writer = EmbeddingCache(capacity=0, cache_dir=cache_dir) if cache_dir else None
+        self._worker_states = {}  # pid -> state from that worker's latest reply
+
+    def _record(self, state):
+        """Keeps the worker's state; returns the (keys, vectors) it computed for the disk tier."""
+        new_embeddings = state.pop("new_embeddings")
+        self._worker_states[state["pid"]] = state
+        return new_embeddings if self._embedding_writer is not None and new_embeddings[0] else None
+
+    async def predict_batch(self, items, model_version=None):
+        loop = asyncio.get_running_loop()
+        state, predictions = await loop.run_in_executor(
+            self._executor, _worker_predict_batch, items, model_version
+        )
+        new_embeddings = self._record(state)
+        if new_embeddings:
+            try:
+                await asyncio.to_thread(self._embedding_writer.store, *new_embeddings)
+            except OSError as exc:
+                print(f"Could not persist worker embeddings: {exc}")
+        return predictions
+
+    async def check_version(self, version):
+        """Throwaway load of `version` in one worker, so a broken artifact fails here, not in every worker."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _worker_check_version, version)
+
+    def warm_up(self, sample):
+        """
+        Blocks until every worker process has started, loaded its models and
+        served one request. Submitting `workers` tasks at once makes the
+        executor spawn the full pool instead of growing it on demand.
+        """
+        futures = [self._executor.submit(_worker_predict_batch, [sample]) for _ in range(self.workers)]
+        done, _ = wait(futures)
+        for future in done:
+            new_embeddings = self._record(future.result()[0])
+            if new_embeddings:
+                self._embedding_writer.store(*new_embeddings)
+
+    def served_versions(self):
+        """Model versions the workers served in their latest replies."""
+        return sorted({state["model_version"] for state in self._worker_states.values()})
+
+    def failed_versions(self):
+        failed = {}
+        for state in self._worker_states.values():
+            failed.update(state["failed_versions"])
+        return failed
+
+    def embedding_cache_stats(self):
+        """Embedding cache counters summed over the workers' latest replies."""
+        caches = [state["embedding_cache"] for state in self._worker_states.values()]
+        if not caches:
+            return None
+        totals = {key: sum(c[key] for c in caches)
+                  for key in ("memory_hits", "disk_hits", "misses", "memory_entries", "memory_capacity")}
+        hits = totals["memory_hits"] + totals["disk_hits"]
+        lookups = hits + totals["misses"]
+        disk_entries = max(c["disk_entries"] for c in caches)
+        if self._embedding_writer is not None:
+            disk_entries = max(disk_entries, self._embedding_writer.stats()["disk_entries"])
+        return {
+            "hits": hits,
+            **totals,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "disk_entries": disk_entries,
+            "disk_dir": self.cache_dir,
+            "model_id": caches[0].get("model_id"),
+            "workers_reporting": len(caches),
+        }
+
+    def stats(self):
+        return {
+            "mode": "process",
+            "workers": self.workers,
+            "workers_reporting": len(self._worker_states),
+            "served_versions": self.served_versions(),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
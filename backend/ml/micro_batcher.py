@@ -0,0 +1,176 @@
+"""
+Dynamic micro-batching for online inference.
+
+Concurrent callers `await batcher.submit(item)`. A single worker task drains
+the queue: it waits up to `max_wait_ms` after the first queued item (or until
+`max_batch_size` items are queued), hands the whole batch to `run_batch` in
+one call and resolves every caller's future with its own result.
+
+Up to `max_concurrency` batches run at once (e.g. one per inference pool
+worker). Each batch runs in its own task, so the worker keeps collecting
+while earlier batches are in flight; when all slots are busy, items queue
+up and the next batch leaves as soon as a slot frees, usually larger.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from threading import Lock
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-style cumulative `le` buckets."""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative[f"{bound:g}"] = running
+            cumulative["+Inf"] = self._count
+            return {
+                "buckets": cumulative,
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "mean": round(self._sum / self._count, 3) if self._count else 0.0,
+            }
+
+
+class MicroBatcher:
+    def __init__(self, run_batch, max_batch_size=32, max_wait_ms=5.0, max_concurrency=1):
+        """
+        `run_batch` is an async callable taking a list of items and returning
+        a list of results in the same order. At most `max_concurrency` calls
+        to it are in flight at once.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self._run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrency = max_concurrency
+
+        self.batch_size_histogram = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.queue_wait_histogram = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000])
+
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._tasks = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = loop.create_task(self._drain())
+
+        future = loop.create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding to the loop
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _drain(self):
+        while True:
+            # Wait for a free slot first: items keep queueing meanwhile and
+            # leave together in the next batch
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            # Callers that gave up (client disconnect, timeout) are dropped
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                self._slots.release()
+                continue
+
+            dispatched_at = time.perf_counter()
+            self.batch_size_histogram.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                self.queue_wait_histogram.observe((dispatched_at - enqueued_at) * 1000.0)
+
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            results = await self._run_batch([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch runner returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_concurrency": self.max_concurrency,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_wait_ms": self.queue_wait_histogram.snapshot(),
+        }
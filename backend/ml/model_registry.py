@@ -0,0 +1,174 @@
+"""
+Versioned model registry for the exploitation classifier.
+
+Layout (default: backend/ml/registry):
+
+    registry/
+      ACTIVE                  <- name of the version being served
+      <version>/
+        model.pkl
+        manifest.json         <- sha256, model type, feature schema, metrics
+
+Versions are immutable once published. Publishing writes into a temporary
+directory and renames it into place, and activation rewrites ACTIVE with
+os.replace, so readers never observe a half-written version or pointer.
+
+Usage (from backend/ml):
+    python model_registry.py publish models/gradient_boosting.pkl --version gb-2026-10 \\
+        --metrics '{"accuracy": 0.91}' --activate
+    python model_registry.py list
+    python model_registry.py activate gb-2026-10
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'registry')
+
+_VERSION_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+
+    def _version_dir(self, version):
+        if not _VERSION_RE.match(version or ''):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def _pointer(self):
+        return os.path.join(self.root, 'ACTIVE')
+
+    def manifest(self, version):
+        path = os.path.join(self._version_dir(version), 'manifest.json')
+        if not os.path.exists(path):
+            raise KeyError(f"Model version {version!r} is not in the registry")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        manifests = []
+        for name in sorted(os.listdir(self.root)):
+            if _VERSION_RE.match(name) and os.path.exists(os.path.join(self.root, name, 'manifest.json')):
+                manifests.append(self.manifest(name))
+        return sorted(manifests, key=lambda m: m.get('created_at', ''))
+
+    def active_version(self):
+        try:
+            with open(self._pointer(), 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def publish(self, model_path, version, metrics=None, activate=False):
+        target = self._version_dir(version)
+        if os.path.exists(target):
+            raise ValueError(f"Model version {version!r} already exists; versions are immutable")
+
+        import joblib
+
+        model = joblib.load(model_path)
+        names = getattr(model, 'feature_names_in_', None)
+        manifest = {
+            'version': version,
+            'model_type': type(model).__name__,
+            'sha256': _sha256(model_path),
+            'feature_schema': [str(n) for n in names] if names is not None else None,
+            'n_features': int(getattr(model, 'n_features_in_', 0)) or None,
+            'metrics': metrics or {},
+            'source': os.path.basename(model_path),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        }
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{version}-", dir=self.root)
+        try:
+            shutil.copyfile(model_path, os.path.join(staging, 'model.pkl'))
+            with open(os.path.join(staging, 'manifest.json'), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return manifest
+
+    def activate(self, version):
+        self.manifest(version)  # raises KeyError for unknown versions
+        tmp = self._pointer() + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp, self._pointer())
+        return version
+
+    def load(self, version, mmap_mode=None):
+        """Returns (model, manifest), refusing artifacts whose hash does not match."""
+        import joblib
+
+        manifest = self.manifest(version)
+        path = os.path.join(self._version_dir(version), 'model.pkl')
+        if _sha256(path) != manifest['sha256']:
+            raise ValueError(f"Model version {version!r} failed its sha256 check")
+        return joblib.load(path, mmap_mode=mmap_mode), manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned classifier artifacts")
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    pub = sub.add_parser('publish', help='add a fitted model as a new version')
+    pub.add_argument('model_path')
+    pub.add_argument('--version', required=True)
+    pub.add_argument('--metrics', default='{}', help='JSON object of evaluation metrics')
+    pub.add_argument('--activate', action='store_true')
+
+    act = sub.add_parser('activate', help='point ACTIVE at an existing version')
+    act.add_argument('version')
+
+    sub.add_parser('list', help='show published versions')
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.registry)
+
+    if args.command == 'publish':
+        manifest = registry.publish(
+            args.model_path, args.version, metrics=json.loads(args.metrics), activate=args.activate
+        )
+        print(f"Published {manifest['version']} ({manifest['model_type']}, sha256 {manifest['sha256'][:12]})")
+    elif args.command == 'activate':
+        try:
+            registry.activate(args.version)
+        except KeyError as e:
+            print(e)
+            sys.exit(1)
+        print(f"Active model version: {args.version}")
+    else:
+        active = registry.active_version()
+        for m in registry.versions():
+            marker = '*' if m['version'] == active else ' '
+            print(f"{marker} {m['version']:<24} {m['model_type']:<28} {m['created_at']}  {json.dumps(m['metrics'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Multi-process sentence embedding for large corpora (CPU training boxes).
+
+Texts are sorted by token length and cut into batches with a token budget:
+short texts travel in large batches, long ones in small batches, and no
+batch is padded far beyond its own longest member. Batches are fixed before
+any worker starts and each is encoded in a single forward pass, so the
+result does not depend on the worker count or on scheduling order; rows are
+scattered back to their original positions.
+
+Workers are spawned (torch and tokenizer threads do not survive a fork) and
+each loads the model once in the pool initializer with a fixed number of
+intra-op threads.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+DEFAULT_TOKENS_PER_BATCH = 8192
+DEFAULT_MAX_BATCH_SIZE = 256
+
+_worker_model = None
+
+
+def _init_worker(model_path, torch_threads):
+    global _worker_model
+
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+    from sentence_transformers import SentenceTransformer
+
+    _worker_model = SentenceTransformer(model_path)
+
+
+def _worker_encode(batch_id, texts):
+    vectors = _worker_model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+    return batch_id, np.asarray(vectors, dtype=np.float32)
+
+
+def token_lengths(texts, tokenizer=None, max_length=None):
+    """
+    Token count per text using the model's tokenizer when available,
+    otherwise a whitespace word count (close enough to order and budget by).
+    """
+    if tokenizer is not None:
+        encoded = tokenizer(list(texts), add_special_tokens=True, truncation=max_length is not None,
+                            max_length=max_length)
+        return np.fromiter((len(ids) for ids in encoded['input_ids']), dtype=np.int64, count=len(texts))
+    lengths = np.fromiter((len(t.split()) + 2 for t in texts), dtype=np.int64, count=len(texts))
+    return np.minimum(lengths, max_length) if max_length else lengths
+
+
+def plan_batches(lengths, tokens_per_batch=DEFAULT_TOKENS_PER_BATCH, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    Returns a list of index arrays. Indices are visited longest first (stable
+    sort, so ties keep input order); a batch closes when padding every member
+    to the batch's longest text would exceed `tokens_per_batch`.
+    """
+    order = np.argsort(-np.asarray(lengths), kind='stable')
+    batches = []
+    start = 0
+    while start < len(order):
+        # Longest-first: the first member sets the padded width of the batch
+        width = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, tokens_per_batch // width))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+def encode_parallel(texts, model_path, workers=None, torch_threads=1, tokenizer=None, max_length=None,
+                    tokens_per_batch=DEFAULT_TOKENS_PER_BATCH, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                    dim=None, progress=True):
+    """
+    Encodes `texts` with `workers` processes and returns a float32
+    (len(texts), dim) matrix in input order.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, dim or 0), dtype=np.float32)
+
+    workers = workers or os.cpu_count() or 1
+    batches = plan_batches(token_lengths(texts, tokenizer, max_length), tokens_per_batch, max_batch_size)
+
+    out = None
+    done_rows = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_path, torch_threads),
+    ) as executor:
+        futures = [
+            executor.submit(_worker_encode, batch_id, [texts[i] for i in idx])
+            for batch_id, idx in enumerate(batches)
+        ]
+        for future in as_completed(futures):
+            batch_id, vectors = future.result()
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[batches[batch_id]] = vectors
+            done_rows += len(vectors)
+            if progress:
+                print(f"\r  encoded {done_rows}/{len(texts)}", end='', flush=True)
+    if progress:
+        print()
+    return out
@@ -0,0 +1,24 @@
+"""
+One SentenceTransformer per model directory per process.
+
+The prediction pipeline and semantic search embed with the same bundled
+MiniLM model. Loading it separately for each would keep two copies of the
+weights (and two sets of torch buffers) in the API process, so both get it
+from load_encoder(), keyed by the resolved model path.
+"""
+import os
+from threading import Lock
+
+_encoders = {}
+_lock = Lock()
+
+
+def load_encoder(model_path):
+    """The process-wide SentenceTransformer for `model_path`, loaded on first use."""
+    key = os.path.realpath(model_path)
+    with _lock:
+        encoder = _encoders.get(key)
+        if encoder is None:
+            from sentence_transformers import SentenceTransformer
+            encoder = _encoders[key] = SentenceTransformer(model_path)
+        return encoder
@@ -4,8 +4,13 @@ import re
 import joblib
 import os
 import json
+import argparse
+from collections import Counter
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 
+OUTPUT_COLS = ['cve_id', 'description', 'cvss', 'cvss_normalized',
+               'product', 'product_encoded', 'exploited']
+
 def clean_text(text):
     if pd.isna(text):
         return ""
@@ -17,11 +22,173 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
+def clean_text_series(series):
+    """Vectorized clean_text over a whole column (same rules, one pass per step)."""
+    return (
+        series.fillna("").astype(str).str.lower()
+        .str.replace(r'[^a-z0-9\s]', ' ', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+
+# -------------------------------------------------------------------------
+# STREAMING MODE
+# -------------------------------------------------------------------------
+def iter_json_records(path, read_size=1 << 20):
+    """
+    Yield records one at a time from either a top-level JSON array or JSON
+    Lines, holding at most one read buffer plus one record in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as file:
+        buf = file.read(read_size)
+        pos = len(buf) - len(buf.lstrip())
+        in_array = buf[pos:pos + 1] == '['
+        if in_array:
+            pos += 1
+
+        while True:
+            # Skip whitespace and separators between records
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buf):
+                    break
+                buf, pos = file.read(read_size), 0
+                if not buf:
+                    return
+            if in_array and buf[pos] == ']':
+                return
+
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                more = file.read(read_size)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield record
+            pos = end
+            # Drop consumed text so the buffer stays bounded
+            if pos > read_size:
+                buf, pos = buf[pos:], 0
+
+def iter_chunks(path, chunk_size):
+    chunk = []
+    for record in iter_json_records(path):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield pd.DataFrame(chunk)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk)
+
+def _median_from_counts(counts):
+    # Same definition as pandas.Series.median (mean of the two middle values)
+    total = sum(counts.values())
+    if total == 0:
+        return np.nan
+    lo_rank, hi_rank = (total - 1) // 2, total // 2
+    lo = hi = None
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if lo is None and seen > lo_rank:
+            lo = value
+        if seen > hi_rank:
+            hi = value
+            break
+    return (lo + hi) / 2
+
+def run_streaming(data_path, out_path, chunk_size):
+    """
+    Two passes over the raw JSON with bounded memory:
+      1. fit the product LabelEncoder and the CVSS StandardScaler (and the
+         CVSS median used for imputation) from streamed chunks
+      2. clean, encode and scale each chunk and append it to the output CSV
+    Memory is one chunk plus the set of distinct products/CVSS values.
+    """
+    print(f"Streaming data from: {data_path} (chunk size {chunk_size})")
+
+    # Pass 1: fit encoders
+    products = set()
+    cvss_counts = Counter()
+    cvss_missing = 0
+    scaler = StandardScaler()
+    has_cvss = has_product = False
+    n_records = 0
+    for df in iter_chunks(data_path, chunk_size):
+        n_records += len(df)
+        if 'product' in df.columns:
+            has_product = True
+            products.update(df['product'].fillna("unknown").unique())
+        else:
+            # Pass 2 fills this chunk with "unknown", so the encoder must know it
+            products.add("unknown")
+        if 'cvss' in df.columns:
+            has_cvss = True
+            cvss = df['cvss'].astype(float)
+            present = cvss.dropna()
+            cvss_missing += int(cvss.isna().sum())
+            cvss_counts.update(present.tolist())
+            if len(present):
+                scaler.partial_fit(present.to_frame('cvss'))
+    print(f"Pass 1: {n_records} records, {len(products)} products, {cvss_missing} missing CVSS values")
+
+    os.makedirs('models', exist_ok=True)
+
+    median_cvss = _median_from_counts(cvss_counts)
+    if has_cvss:
+        # The in-memory path fits the scaler after median imputation
+        for start in range(0, cvss_missing, chunk_size):
+            n = min(chunk_size, cvss_missing - start)
+            scaler.partial_fit(pd.DataFrame({'cvss': np.full(n, median_cvss)}))
+        joblib.dump(scaler, 'models/cvss_scaler.pkl')
+        print(" -> Saved CVSS StandardScaler to models/cvss_scaler.pkl")
+
+    le = None
+    if has_product:
+        le = LabelEncoder().fit(sorted(products))
+        joblib.dump(le, 'models/product_encoder.pkl')
+        print(" -> Saved Product LabelEncoder to models/product_encoder.pkl")
+
+    # Pass 2: transform and write
+    written = 0
+    for df in iter_chunks(data_path, chunk_size):
+        if has_cvss:
+            df['cvss'] = df['cvss'].astype(float).fillna(median_cvss) if 'cvss' in df.columns else median_cvss
+            df['cvss_normalized'] = scaler.transform(df[['cvss']])[:, 0]
+        if 'description' in df.columns:
+            df['description'] = clean_text_series(df['description'])
+        if le is not None:
+            df['product'] = df['product'].fillna("unknown") if 'product' in df.columns else "unknown"
+            df['product_encoded'] = le.transform(df['product'])
+
+        cols = [col for col in OUTPUT_COLS if col in df.columns]
+        df[cols].to_csv(out_path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += len(df)
+
+    print(f"Success! Processed data saved to {out_path} with {written} records.")
+
 def main():
+    parser = argparse.ArgumentParser(description="Step 2: Data Preprocessing")
+    parser.add_argument('--input', default='data/cve_part_1.json',
+                        help='JSON array or JSON Lines file of CVE records')
+    parser.add_argument('--output', default='data/processed_vulnerabilities.csv')
+    parser.add_argument('--stream', action='store_true',
+                        help='process in chunks with bounded memory (for full NVD history)')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    args = parser.parse_args()
+
     print("Step 2: Data Preprocessing Initialization")
+
+    if args.stream:
+        run_streaming(args.input, args.output, args.chunk_size)
+        return
     
     # 1. Load dataset
-    data_path = 'data/cve_part_1.json'
+    data_path = args.input
     print(f"Loading data from: {data_path}")
     
     with open(data_path, 'r', encoding='utf-8') as file:
@@ -71,14 +238,12 @@ def main():
         print(" -> Saved CVSS StandardScaler to models/cvss_scaler.pkl")
     
     # Filter to desired columns (we keep original description for TFIDF and cve_id for index)
-    output_cols = ['cve_id', 'description', 'cvss', 'cvss_normalized', 
-                   'product', 'product_encoded', 'exploited']
     # Ensuring only existing columns are added
-    output_cols = [col for col in output_cols if col in df.columns]
+    output_cols = [col for col in OUTPUT_COLS if col in df.columns]
     df_out = df[output_cols]
     
     # 6. Save processed output
-    out_path = 'data/processed_vulnerabilities.csv'
+    out_path = args.output
     df_out.to_csv(out_path, index=False)
     print(f"Success! Processed data saved to {out_path} with {len(df_out)} records.")
 
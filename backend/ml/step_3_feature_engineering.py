@@ -1,14 +1,101 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
 from sentence_transformers import SentenceTransformer
 
+try:
+    from ml.embedding_cache import EmbeddingCache, read_model_id, write_model_source
+    from ml.feature_store import DEFAULT_STORE_DIR, FeatureStore
+    from ml.parallel_encoder import DEFAULT_TOKENS_PER_BATCH, encode_parallel
+except ImportError:
+    from embedding_cache import EmbeddingCache, read_model_id, write_model_source
+    from feature_store import DEFAULT_STORE_DIR, FeatureStore
+    from parallel_encoder import DEFAULT_TOKENS_PER_BATCH, encode_parallel
+
+def resolve_revision(model_name, revision=None):
+    """
+    Commit hash of `revision` (default: the current main) on the Hugging Face
+    Hub, so cached embeddings name the exact weights that produced them.
+    Falls back to the revision as given when the Hub cannot be reached.
+    """
+    repo_id = model_name if '/' in model_name else f'sentence-transformers/{model_name}'
+    try:
+        from huggingface_hub import model_info
+        return model_info(repo_id, revision=revision).sha
+    except Exception as e:
+        print(f"Warning: could not resolve {repo_id}@{revision or 'main'} on the Hub: {e}")
+        return revision or 'main'
+
+def load_model(model_name, model_path, revision=None):
+    """
+    Loads the embedding model from `model_path` when the copy saved there is
+    `model_name` (at `revision`, if one is requested). Otherwise downloads it
+    once (reusing the Hugging Face cache when it already holds that
+    revision), saves it to `model_path` and records its name@revision there.
+    Returns (model, model_id).
+    """
+    model_id = read_model_id(model_path)
+    saved_name, saved_revision = model_id.rsplit('@', 1) if model_id else (None, None)
+    if saved_name == model_name and revision not in (None, saved_revision):
+        # A branch or tag may still point at the saved commit
+        revision = resolve_revision(model_name, revision)
+    if saved_name == model_name and revision in (None, saved_revision):
+        print(f"Loading local copy of embedding model {model_id} from {model_path}...")
+        return SentenceTransformer(model_path), model_id
+
+    if revision is None:
+        revision = resolve_revision(model_name)
+    print(f"Loading Hugging Face model: {model_name}@{revision}...")
+    model = SentenceTransformer(model_name, revision=revision)
+    # Saved for reuse by later runs and by Step 6
+    os.makedirs(model_path, exist_ok=True)
+    model.save(model_path)
+    write_model_source(model_path, model_name, revision)
+    print(f" -> Saved local copy of embedding model to {model_path}")
+    return model, read_model_id(model_path)
+
+def encode_incremental(encode, texts, cache_dir, dim, model_id=None):
+    """
+    Encodes only texts whose content hash is not yet in the on-disk embedding
+    cache and gathers the rest from it. The cache uses the same keys as the
+    prediction service (see embedding_cache.text_key), so either can warm
+    the other when pointed at the same directory with the same model.
+    Returns (embeddings, reused_rows, encoded_texts).
+    """
+    cache = EmbeddingCache(capacity=0, cache_dir=cache_dir, model_id=model_id)
+    encoded = []
+
+    def encoder(batch):
+        encoded.append(len(batch))
+        return encode(batch)
+
+    embeddings = cache.encode(texts, encoder, dim=dim)
+    return embeddings, cache.stats()['disk_hits'], sum(encoded)
+
 def main():
     """
     Step 3: Feature Engineering using Hugging Face Sentence Transformers (MiniLM)
     This script converts the text input into 384-dimensional dense vectors
     and concatenates it with our structured data.
     """
+    parser = argparse.ArgumentParser(description="Step 3: Feature Engineering")
+    parser.add_argument('--output-format', choices=['store', 'csv', 'both'], default='store',
+                        help="'store' writes the columnar feature store, 'csv' the legacy final_features.csv")
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--incremental', action='store_true',
+                        help='reuse embeddings of unchanged texts from --embedding-cache-dir')
+    parser.add_argument('--embedding-cache-dir', default='data/embedding_cache')
+    parser.add_argument('--model-revision', default=None,
+                        help='Hugging Face revision of the embedding model (default: the saved copy, else main)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='encode with N CPU worker processes (0 = single process)')
+    parser.add_argument('--torch-threads', type=int, default=1,
+                        help='intra-op threads per worker process')
+    parser.add_argument('--tokens-per-batch', type=int, default=DEFAULT_TOKENS_PER_BATCH,
+                        help='padded token budget per batch in multi-process mode')
+    args = parser.parse_args()
+
     print("Step 3: Feature Engineering with Sentence Transformers (Option A)")
     
     # 1. Load Data
@@ -28,43 +115,63 @@ def main():
     print("Combining Description and Product for unified embedding representation...")
     combined_text = df['description'] + " " + df['product']
     
-    # 3. Load Model (all-MiniLM-L6-v2)
+    # 3. Load Model (all-MiniLM-L6-v2), from the local copy when it is current
     model_name = 'all-MiniLM-L6-v2'
-    print(f"Loading Hugging Face model: {model_name}...")
-    model = SentenceTransformer(model_name)
-    
-    # Bonus: Save embedding model locally for reuse in Step 6
     model_path = 'models/minilm_model'
-    os.makedirs(model_path, exist_ok=True)
-    model.save(model_path)
-    print(f" -> Saved local copy of embedding model to {model_path}")
+    model, model_id = load_model(model_name, model_path, args.model_revision)
     
     # 4. Generate Embeddings
-    print("Encoding text... (This may take a moment)")
-    # Using show_progress_bar=True as requested to view encoding status in terminal
-    embeddings = model.encode(combined_text.tolist(), show_progress_bar=True)
+    if args.workers > 0:
+        print(f"Multi-process encoding with {args.workers} workers x {args.torch_threads} threads")
+
+        def encode(texts):
+            return encode_parallel(
+                texts, model_path, workers=args.workers, torch_threads=args.torch_threads,
+                tokenizer=getattr(model, 'tokenizer', None),
+                max_length=getattr(model, 'max_seq_length', None),
+                tokens_per_batch=args.tokens_per_batch,
+            )
+    else:
+        def encode(texts):
+            # Using show_progress_bar=True as requested to view encoding status in terminal
+            return model.encode(texts, show_progress_bar=True)
     
-    print(f"Generated {embeddings.shape[0]} embeddings of length {embeddings.shape[1]}")
+    if args.incremental:
+        print(f"Encoding new or changed texts (cache: {args.embedding_cache_dir})...")
+        embeddings, reused, computed = encode_incremental(
+            encode, combined_text.tolist(), args.embedding_cache_dir,
+            model.get_sentence_embedding_dimension(), model_id=model_id,
+        )
+        print(f" -> Reused {reused} embeddings, computed {computed}")
+    else:
+        print("Encoding text... (This may take a moment)")
+        embeddings = encode(combined_text.tolist())
     
-    # 5. Convert Embeddings to a Pandas DataFrame
-    emb_cols = [f"emb_{i}" for i in range(embeddings.shape[1])]
-    emb_df = pd.DataFrame(embeddings, columns=emb_cols)
+    print(f"Generated {embeddings.shape[0]} embeddings of length {embeddings.shape[1]}")
     
-    # 6. Concatenate with Structured Features
+    # 5. Structured Features
     # The final dataset must include embedding features, cvss_score, and label
     cols_to_keep = ['cve_id', 'cvss_normalized', 'exploited']
     # Safely filter existing columns
     cols_to_keep = [c for c in cols_to_keep if c in df.columns]
     
     df_structured = df[cols_to_keep].reset_index(drop=True)
-    final_df = pd.concat([df_structured, emb_df], axis=1)
     
-    print(f"Final feature dataset shape: {final_df.shape}")
+    # 6. Output Result
+    if args.output_format in ('store', 'both'):
+        store = FeatureStore(args.store_dir)
+        manifest = store.write(df_structured, embeddings, embedding_model=model_id)
+        print(f"Success! Feature store ({manifest['n_rows']} x {manifest['dim']}) written to: {store.root}")
     
-    # 7. Output Result
-    out_path = 'data/final_features.csv'
-    final_df.to_csv(out_path, index=False)
-    print(f"Success! Processed dataset exported to: {out_path}")
+    if args.output_format in ('csv', 'both'):
+        emb_cols = [f"emb_{i}" for i in range(embeddings.shape[1])]
+        emb_df = pd.DataFrame(embeddings, columns=emb_cols)
+        final_df = pd.concat([df_structured, emb_df], axis=1)
+        print(f"Final feature dataset shape: {final_df.shape}")
+        
+        out_path = 'data/final_features.csv'
+        final_df.to_csv(out_path, index=False)
+        print(f"Success! Processed dataset exported to: {out_path}")
 
 if __name__ == "__main__":
     main()
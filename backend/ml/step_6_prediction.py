@@ -3,8 +3,19 @@ import numpy as np
 import joblib
 import re
 import os
+import threading
 import warnings
-from sentence_transformers import SentenceTransformer
+
+try:
+    from ml.embedding_cache import EmbeddingCache, read_model_id
+    from ml.model_registry import ModelRegistry
+    from ml.shared_encoder import load_encoder
+    from ml.tree_ensemble import CompiledTreeEnsemble
+except ImportError:  # running from inside backend/ml
+    from embedding_cache import EmbeddingCache, read_model_id
+    from model_registry import ModelRegistry
+    from shared_encoder import load_encoder
+    from tree_ensemble import CompiledTreeEnsemble
 
 # Fix for NumPy compatibility issues with older pickled models
 import numpy.random._pickle
@@ -18,10 +29,33 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
+def _priority_from_risk(risk_score):
+    if risk_score >= 75:
+        return "CRITICAL"
+    if risk_score >= 50:
+        return "HIGH"
+    if risk_score >= 25:
+        return "MEDIUM"
+    return "LOW"
+
+class _ModelSlot:
+    """A fitted classifier plus everything derived from it at load time."""
+
+    def __init__(self, model, classifier, version, cvss_col, emb_cols):
+        self.model = model
+        self.classifier = classifier
+        self.version = version
+        self.cvss_col = cvss_col
+        self.emb_cols = emb_cols
+
 class CVEPredictor:
-    def __init__(self, model_dir='models'):
+    def __init__(self, model_dir='models', cache_size=4096, cache_dir=None, mmap_mode=None,
+                 cache_read_only=False, classifier_backend='sklearn', registry_dir=None,
+                 cache_refresh_s=30.0):
         print("Loading prediction pipeline and models...")
         self.model_dir = model_dir
+        self.mmap_mode = mmap_mode
+        self.classifier_backend = classifier_backend
         
         # Load models with compatibility handling
         try:
@@ -32,77 +66,313 @@ class CVEPredictor:
             import pickle
             with open(os.path.join(model_dir, 'cvss_scaler.pkl'), 'rb') as f:
                 self.cvss_scaler = pickle.load(f)
+
+        # StandardScaler is a closed-form affine map; skip sklearn's per-call validation
+        mean = getattr(self.cvss_scaler, 'mean_', None)
+        scale = getattr(self.cvss_scaler, 'scale_', None)
+        self._cvss_affine = (float(mean[0]), float(scale[0])) if mean is not None and scale is not None else None
         
         print("Loading local MiniLM embeddings model...")
-        self.transformer = SentenceTransformer(os.path.join(model_dir, 'minilm_model'))
-        
+        transformer_path = os.path.join(model_dir, 'minilm_model')
+        # Shared with semantic search in the same process
+        self.transformer = load_encoder(transformer_path)
+        self.n_features = 1 + self.transformer.get_sentence_embedding_dimension()
+        # Repeated CVE texts skip the transformer entirely; keys carry the
+        # model's name@revision so they match what step 3 cached
+        self.embedding_cache = EmbeddingCache(
+            capacity=cache_size, cache_dir=cache_dir, read_only=cache_read_only, refresh_s=cache_refresh_s,
+            model_id=read_model_id(transformer_path),
+        )
+
+        # Per-thread preallocated row for single predictions
+        self._row_buffers = threading.local()
+
+        # The registry's ACTIVE version wins; without one (or if it cannot be
+        # loaded), use the bundled models
+        self.registry = ModelRegistry(registry_dir) if registry_dir else None
+        self._swap_lock = threading.Lock()
+        self._loading_lock = threading.Lock()
+        self._loading_version = None
+        # Versions that failed to load; background swaps do not retry them
+        self.failed_versions = {}
+        self._slot = None
+        version = self.registry.active_version() if self.registry else None
+        if version:
+            try:
+                self._slot = self._load_version_slot(version)
+                print(f"Using registry model version {version}")
+            except Exception as e:
+                self.failed_versions[version] = str(e)
+                print(f"Warning: could not load registry model version {version}: {e}")
+        if self._slot is None:
+            model, version = self._load_bundled_model(model_dir, mmap_mode)
+            self._slot = self._prepare_slot(model, version)
+
+    @staticmethod
+    def _load_bundled_model(model_dir, mmap_mode):
+        # mmap_mode='r' lets several worker processes share the model arrays
+        # through the page cache instead of each holding a private copy
         # We explicitly load the gradient boosting model updated in Step 4
         # If gradient_boosting fails, fallback to random_forest
         try:
-            self.model = joblib.load(os.path.join(model_dir, 'gradient_boosting.pkl'))
+            model = joblib.load(os.path.join(model_dir, 'gradient_boosting.pkl'), mmap_mode=mmap_mode)
             print("Using Gradient Boosting model")
+            return model, 'bundled-gradient_boosting'
         except Exception as e:
             print(f"Warning: Could not load gradient_boosting.pkl: {e}")
             print("Falling back to Random Forest model...")
+        try:
+            model = joblib.load(os.path.join(model_dir, 'random_forest.pkl'), mmap_mode=mmap_mode)
+            print("Using Random Forest model")
+            return model, 'bundled-random_forest'
+        except Exception as e2:
+            print(f"Warning: Could not load random_forest.pkl: {e2}")
+            print("Falling back to Logistic Regression model...")
+        model = joblib.load(os.path.join(model_dir, 'logistic_regression.pkl'), mmap_mode=mmap_mode)
+        print("Using Logistic Regression model")
+        return model, 'bundled-logistic_regression'
+
+    # Backwards-compatible views of the model currently being served
+    @property
+    def model(self):
+        return self._slot.model
+
+    @property
+    def classifier(self):
+        return self._slot.classifier
+
+    @property
+    def model_version(self):
+        return self._slot.version
+
+    def _prepare_slot(self, model, version):
+        cvss_col, emb_cols = self._resolve_feature_layout(model)
+        # `classifier` is what inference calls; `model` stays the fitted sklearn estimator
+        classifier = model
+        if self.classifier_backend == 'compiled':
+            classifier = self._compile_classifier(model)
+        return _ModelSlot(model, classifier, version, cvss_col, emb_cols)
+
+    def swap_model(self, model, version):
+        """
+        Atomically replace the served classifier. The new slot is fully built
+        (layout checked, optionally compiled) before a single reference
+        assignment publishes it, so in-flight predictions finish on the old
+        model and the transformer is never reloaded.
+        """
+        slot = self._prepare_slot(model, version)
+        self._slot = slot
+        print(f"Serving model version {version}")
+        return version
+
+    def _load_version_slot(self, version):
+        model, _ = self.registry.load(version, mmap_mode=self.mmap_mode)
+        return self._prepare_slot(model, version)
+
+    def check_version(self, version):
+        """Load and validate `version` without serving it; raises what activate_version() would."""
+        if self.registry is None:
+            raise RuntimeError("No model registry configured")
+        self._load_version_slot(version)
+        return version
+
+    def activate_version(self, version):
+        """Load `version` and serve it; on failure the current model stays in place."""
+        if self.registry is None:
+            raise RuntimeError("No model registry configured")
+        with self._swap_lock:
+            if version == self._slot.version:
+                return version
             try:
-                self.model = joblib.load(os.path.join(model_dir, 'random_forest.pkl'))
-                print("Using Random Forest model")
-            except Exception as e2:
-                print(f"Warning: Could not load random_forest.pkl: {e2}")
-                print("Falling back to Logistic Regression model...")
-                self.model = joblib.load(os.path.join(model_dir, 'logistic_regression.pkl'))
-                print("Using Logistic Regression model")
-        
+                slot = self._load_version_slot(version)
+            except Exception as e:
+                self.failed_versions[version] = str(e)
+                raise
+            self.failed_versions.pop(version, None)
+            self._slot = slot
+            print(f"Serving model version {version}")
+            return version
+
+    def request_version(self, version):
+        """
+        Non-blocking activate_version() for the request path: the load and
+        sha256 check run in a background thread while predictions keep using
+        the current model. Returns True if a load was started. Versions that
+        already failed are skipped (an explicit activate_version() retries).
+        """
+        if not version or version == self._slot.version or version in self.failed_versions:
+            return False
+        with self._loading_lock:
+            if self._loading_version is not None:
+                return False
+            self._loading_version = version
+
+        def _load():
+            try:
+                self.activate_version(version)
+            except Exception as e:
+                print(f"Model hot-swap to {version} failed, still serving {self.model_version}: {e}")
+            finally:
+                with self._loading_lock:
+                    self._loading_version = None
+
+        threading.Thread(target=_load, name="model-hot-swap", daemon=True).start()
+        return True
+
+    # The compiled evaluator wins on online-sized batches; sklearn's Cython
+    # traversal is faster once a batch is large (see bench_tree_ensemble.py)
+    COMPILED_MAX_ROWS = 256
+
+    @classmethod
+    def _predict_proba(cls, slot, X_input):
+        if slot.classifier is not slot.model and X_input.shape[0] > cls.COMPILED_MAX_ROWS:
+            return slot.model.predict_proba(X_input)
+        return slot.classifier.predict_proba(X_input)
+
+    def _compile_classifier(self, model, tolerance=1e-6):
+        """
+        Build the flattened NumPy tree evaluator, but only use it after
+        checking it reproduces predict_proba on a probe batch.
+        """
+        try:
+            compiled = CompiledTreeEnsemble.from_estimator(model)
+            probe = np.random.default_rng(0).standard_normal((64, self.n_features))
+            error = compiled.max_abs_error(model, probe)
+            if error > tolerance:
+                raise ValueError(f"max |p - p_sklearn| = {error:.2e} exceeds {tolerance:.0e}")
+        except Exception as e:
+            print(f"Warning: compiled tree backend unavailable ({e}); using sklearn predict_proba")
+            return model
+        print(f"Using compiled tree evaluator ({compiled.n_trees} trees, depth {compiled.max_depth})")
+        return compiled
+
+    def _resolve_feature_layout(self, model):
+        """
+        Resolve, once per model, where cvss_normalized and emb_0..emb_N live
+        in its input so inference can fill a plain NumPy buffer instead of
+        building named DataFrames on every call.
+        """
+        n_emb = self.n_features - 1
+        expected = ['cvss_normalized'] + [f"emb_{i}" for i in range(n_emb)]
+
+        names = getattr(model, 'feature_names_in_', None)
+        if names is not None:
+            names = [str(n) for n in names]
+            if sorted(names) != sorted(expected):
+                missing = sorted(set(expected) - set(names))[:5]
+                extra = sorted(set(names) - set(expected))[:5]
+                raise ValueError(
+                    f"Model features do not match the embedding pipeline "
+                    f"(missing: {missing}, unexpected: {extra})"
+                )
+            position = {name: i for i, name in enumerate(names)}
+        else:
+            n_in = getattr(model, 'n_features_in_', self.n_features)
+            if n_in != self.n_features:
+                raise ValueError(f"Model expects {n_in} features, pipeline produces {self.n_features}")
+            position = {name: i for i, name in enumerate(expected)}
+
+        cvss_col = position['cvss_normalized']
+        emb_idx = np.array([position[f"emb_{i}"] for i in range(n_emb)])
+        if np.array_equal(emb_idx, np.arange(emb_idx[0], emb_idx[0] + n_emb)):
+            emb_idx = slice(int(emb_idx[0]), int(emb_idx[0]) + n_emb)
+        return cvss_col, emb_idx
+
+    def _scale_cvss(self, cvss):
+        cvss = np.asarray(cvss, dtype=np.float64).reshape(-1, 1)
+        if self._cvss_affine is not None:
+            mean, scale = self._cvss_affine
+            return ((cvss - mean) / scale)[:, 0]
+        return self.cvss_scaler.transform(cvss)[:, 0]
+
+    @staticmethod
+    def _build_features(slot, cvss_scaled, embeddings, out):
+        out[:, slot.cvss_col] = cvss_scaled
+        out[:, slot.emb_cols] = embeddings
+        return out
+
+    def _row_buffer(self):
+        buf = getattr(self._row_buffers, 'row', None)
+        if buf is None:
+            buf = np.empty((1, self.n_features), dtype=np.float64)
+            self._row_buffers.row = buf
+        return buf
+
+    def _embed(self, texts, batch_size=32):
+        return self.embedding_cache.encode(
+            texts,
+            lambda missing: self.transformer.encode(
+                missing, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True
+            ),
+            dim=self.transformer.get_sentence_embedding_dimension(),
+        )
+
     def predict(self, cve_id, cvss_score, description, product):
-        print(f"\\n--- Predicting for {cve_id} ---")
-        
         # 1. Preprocess & Combine Data identically to Step 3
-        desc_clean = clean_text(description)
-        combined_text = f"{desc_clean} {product}"
-        
-        # Scale CVSS
-        cvss_scaled = self.cvss_scaler.transform([[cvss_score]])[0][0]
-        # We only kept cvss_normalized
-        df_structured = pd.DataFrame({
-            'cvss_normalized': [cvss_scaled]
-        })
-        
-        # 2. Extract Embeddings (disable progress bar for individual inferences)
-        embedding = self.transformer.encode([combined_text], show_progress_bar=False)
-        emb_cols = [f"emb_{i}" for i in range(embedding.shape[1])]
-        emb_df = pd.DataFrame(embedding, columns=emb_cols)
-        
-        # 3. Compile Input Vector
-        # Ensure it matches model expectations (e.g. cvss_normalized + emb_X...)
-        X_input = pd.concat([df_structured, emb_df], axis=1)
-        
-        # Predict Probabilities
-        prob = self.model.predict_proba(X_input)[0][1] # P(Exploited = 1)
-        pred_class = self.model.predict(X_input)[0]
-        
+        combined_text = f"{clean_text(description)} {product}"
+
+        # 2. Extract Embeddings
+        embedding = self._embed([combined_text])
+
+        # 3. Compile Input Vector (cvss_normalized + emb_X...) in place
+        slot = self._slot
+        X_input = self._build_features(slot, self._scale_cvss([cvss_score]), embedding, self._row_buffer())
+
+        # Predict Probabilities; the class label comes from the same output
+        proba = self._predict_proba(slot, X_input)[0]
+        pred_class = slot.model.classes_[int(np.argmax(proba))]
+
         # Convert to Risk
-        risk_score = round(prob * 100, 2)
-        if risk_score >= 75:
-            priority = "CRITICAL"
-        elif risk_score >= 50:
-            priority = "HIGH"
-        elif risk_score >= 25:
-            priority = "MEDIUM"
-        else:
-            priority = "LOW"
-            
-        print(f"Prediction Results:")
-        print(f"  - Exploitation Probability: {risk_score}%")
-        print(f"  - Recommended Priority: {priority}")
-        print(f"  - Classified Label: {'Exploited' if pred_class == 1 else 'Not Exploited'}\\n")
-        
+        risk_score = round(float(proba[1]) * 100, 2) # P(Exploited = 1)
+
         return {
             'cve_id': cve_id,
             'risk_score': risk_score,
-            'priority': priority,
-            'class': pred_class
+            'priority': _priority_from_risk(risk_score),
+            'class': pred_class,
+            'model_version': slot.version
         }
 
+    def predict_batch(self, items, batch_size=64):
+        """
+        Vectorized counterpart of predict() for scoring many CVEs at once.
+        `items` is a list of dicts with cve_id, cvss_score, description and
+        product. All descriptions go through the transformer in one batched
+        encode and the classifier sees a single feature matrix, so there is
+        exactly one predict_proba call per batch.
+        """
+        if not items:
+            return []
+
+        # 1. Preprocess & Combine Data identically to Step 3
+        texts = [f"{clean_text(item['description'])} {item['product']}" for item in items]
+        cvss = [float(item['cvss_score']) for item in items]
+
+        # 2. Extract Embeddings in one batched pass
+        embeddings = self._embed(texts, batch_size=batch_size)
+
+        # 3. Compile Input Matrix (cvss_normalized + emb_X...)
+        slot = self._slot
+        X_input = self._build_features(
+            slot, self._scale_cvss(cvss), embeddings, np.empty((len(items), self.n_features), dtype=np.float64)
+        )
+
+        # Class labels come from the same probabilities instead of a second predict()
+        proba = self._predict_proba(slot, X_input)
+        pred_classes = slot.model.classes_[np.argmax(proba, axis=1)]
+        risk_scores = np.round(proba[:, 1] * 100, 2) # P(Exploited = 1)
+
+        return [
+            {
+                'cve_id': item.get('cve_id'),
+                'risk_score': float(risk_score),
+                'priority': _priority_from_risk(risk_score),
+                'class': pred_class,
+                'model_version': slot.version
+            }
+            for item, risk_score, pred_class in zip(items, risk_scores, pred_classes)
+        ]
+
 if __name__ == "__main__":
     predictor = CVEPredictor()
     
@@ -113,4 +383,8 @@ if __name__ == "__main__":
         'description': 'A critical remote code execution vulnerability exists in the web server allowing unauthenticated attackers to execute arbitrary shell commands via crafted HTTP requests.',
         'product': 'webcart'
     }
-    predictor.predict(**cve1)
+    result = predictor.predict(**cve1)
+    print(f"Prediction Results for {result['cve_id']}:")
+    print(f"  - Exploitation Probability: {result['risk_score']}%")
+    print(f"  - Recommended Priority: {result['priority']}")
+    print(f"  - Classified Label: {'Exploited' if result['class'] == 1 else 'Not Exploited'}")
@@ -0,0 +1,138 @@
+"""
+Flattened NumPy evaluator for fitted sklearn tree ensembles.
+
+All trees of a GradientBoostingClassifier or RandomForestClassifier are
+concatenated into contiguous node arrays (feature, threshold, left, right,
+value). A batch is scored by walking every (row, tree) pair one level per
+step with vectorized gathers, so the cost no longer includes sklearn's
+per-estimator Python dispatch and input validation.
+
+Leaves point to themselves, so after `max_depth` steps every walk has
+settled on its leaf regardless of how deep each individual tree is.
+"""
+import numpy as np
+
+_LEAF = -1  # sklearn's TREE_LEAF marker in children_left / children_right
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class CompiledTreeEnsemble:
+    def __init__(self, kind, classes, n_features, feature, threshold, left, right,
+                 value, roots, max_depth, base_score=0.0, raw_scale=1.0):
+        self.kind = kind
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_score = base_score
+        self.raw_scale = raw_scale
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_estimator(cls, model):
+        name = type(model).__name__
+        if name == "GradientBoostingClassifier":
+            return cls._from_gradient_boosting(model)
+        if name in ("RandomForestClassifier", "ExtraTreesClassifier"):
+            return cls._from_forest(model)
+        raise TypeError(f"Cannot compile {name}; only gradient boosting and random forest are supported")
+
+    @classmethod
+    def _from_gradient_boosting(cls, model):
+        if model.estimators_.shape[1] != 1:
+            raise TypeError("Only binary GradientBoostingClassifier models can be compiled")
+        n_features = model.n_features_in_
+        # init_ is a constant (class prior log-odds or zero); evaluate it once
+        base_score = float(model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0])
+        raw_scale = 2.0 if getattr(model, "loss", "log_loss") == "exponential" else 1.0
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        # Leaf values are stored unscaled; bake the learning rate in at compile time
+        values = [t.value[:, 0, 0] * model.learning_rate for t in trees]
+        return cls._pack(
+            "gradient_boosting", model.classes_, n_features, trees, values,
+            base_score=base_score, raw_scale=raw_scale,
+        )
+
+    @classmethod
+    def _from_forest(cls, model):
+        if model.n_outputs_ != 1:
+            raise TypeError("Only single-output forests can be compiled")
+        trees = [est.tree_ for est in model.estimators_]
+        values = []
+        for t in trees:
+            v = t.value[:, 0, :].astype(np.float64)
+            # Older sklearn stores class counts, newer stores fractions; normalise both
+            v /= np.maximum(v.sum(axis=1, keepdims=True), 1e-12)
+            values.append(v)
+        return cls._pack("forest", model.classes_, model.n_features_in_, trees, values)
+
+    @classmethod
+    def _pack(cls, kind, classes, n_features, trees, values, **kwargs):
+        offsets = np.cumsum([0] + [t.node_count for t in trees])
+        total = int(offsets[-1])
+
+        feature = np.zeros(total, dtype=np.intp)
+        threshold = np.empty(total, dtype=np.float64)
+        left = np.empty(total, dtype=np.intp)
+        right = np.empty(total, dtype=np.intp)
+        value = np.concatenate(values, axis=0)
+
+        for tree, start in zip(trees, offsets[:-1]):
+            end = start + tree.node_count
+            own = np.arange(start, end)
+            is_leaf = tree.children_left == _LEAF
+            feature[start:end] = np.where(is_leaf, 0, tree.feature)
+            threshold[start:end] = np.where(is_leaf, np.inf, tree.threshold)
+            left[start:end] = np.where(is_leaf, own, tree.children_left + start)
+            right[start:end] = np.where(is_leaf, own, tree.children_right + start)
+
+        return cls(
+            kind, np.asarray(classes), n_features, feature, threshold, left, right, value,
+            roots=offsets[:-1].astype(np.intp),
+            max_depth=max(t.max_depth for t in trees),
+            **kwargs,
+        )
+
+    def _leaves(self, X):
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        flat = X.ravel()
+        row_base = (np.arange(n_rows, dtype=np.intp) * X.shape[1])[:, None]
+
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = flat[row_base + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n, {self.n_features_in_}), got {X.shape}")
+        leaves = self._leaves(X)
+
+        if self.kind == "gradient_boosting":
+            raw = self.base_score + self.value[leaves].sum(axis=1)
+            p = _sigmoid(self.raw_scale * raw)
+            return np.column_stack([1.0 - p, p])
+
+        return self.value[leaves].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def max_abs_error(self, model, X):
+        """Largest absolute difference from model.predict_proba on X."""
+        return float(np.max(np.abs(self.predict_proba(X) - model.predict_proba(X))))
@@ -14,4 +14,6 @@ class Incident(Base):
     link_hash = Column(String(64), nullable=False, unique=True)
     origin = Column(String(100))
     published_at = Column(DateTime, index=True)
+    # id of the first incident of its near-duplicate cluster (NULL for rows ingested before clustering)
+    cluster_id = Column(Integer, index=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
@@ -0,0 +1,277 @@
+"""
+Near-duplicate detection for incidents (MinHash + LSH).
+
+The same story syndicated by many outlets arrives under different links,
+so the exact link_hash check does not catch it. Each incident's title and
+description are normalised (HTML stripped, the " - Outlet" suffix and
+outlet name removed, lowercased words) and shingled into word bigrams; a
+MinHash signature of NEAR_DUP_NUM_PERM 32-bit values estimates the
+Jaccard similarity of two shingle sets.
+
+Signatures are banded for LSH (NEAR_DUP_BANDS bands of equal rows): two
+incidents become candidates when any band is identical, and a candidate is
+accepted when the estimated similarity is at least NEAR_DUP_THRESHOLD. An
+accepted incident joins the candidate's cluster; otherwise it starts its
+own, with its id as the cluster id. The index can outlive the rows it
+points at (a reset or pruned database), so cluster_batch() checks matched
+clusters against the caller's store and forgets the ones that are gone.
+
+The index holds the last NEAR_DUP_MAX_ITEMS signatures in memory and is
+persisted to NEAR_DUP_INDEX_PATH as an append-only file of fixed-size
+records (compacted on load), so restarts keep recent clusters.
+"""
+import html
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+NEAR_DUP_INDEX_PATH = os.getenv("NEAR_DUP_INDEX_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "near_dup_index.bin"
+)
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.6"))
+NEAR_DUP_NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", "64"))
+NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))
+NEAR_DUP_MAX_ITEMS = int(os.getenv("NEAR_DUP_MAX_ITEMS", "20000"))
+
+_PRIME = (1 << 31) - 1
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(title: str, description: str = "", source: str = "") -> list:
+    """Lowercased words of title + description without markup or outlet name."""
+    source = (source or "").strip()
+    if source and title.endswith(f" - {source}"):
+        title = title[:-len(source) - 3]
+    text = html.unescape(_TAG_RE.sub(" ", f"{title} {description}")).lower()
+    words = _WORD_RE.findall(text)
+    if source:
+        # Drop the outlet name where it appears as whole words ("ET" must not eat "target")
+        name = _WORD_RE.findall(source.lower())
+        n = len(name)
+        if n:
+            kept, i = [], 0
+            while i < len(words):
+                if words[i:i + n] == name:
+                    i += n
+                else:
+                    kept.append(words[i])
+                    i += 1
+            words = kept
+    return words
+
+
+def shingles(words: list) -> set:
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class NearDuplicateIndex:
+    def __init__(self, path: Optional[str] = NEAR_DUP_INDEX_PATH, num_perm: int = NEAR_DUP_NUM_PERM,
+                 bands: int = NEAR_DUP_BANDS, threshold: float = NEAR_DUP_THRESHOLD,
+                 max_items: int = NEAR_DUP_MAX_ITEMS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_items = max_items
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+        self._record = np.dtype([("id", "<i8"), ("cluster", "<i8"), ("sig", "<u4", (num_perm,))])
+
+        self._entries = OrderedDict()   # incident id -> (cluster id, signature)
+        self._buckets = {}              # (band, band bytes) -> set of incident ids
+        self._lock = threading.RLock()
+
+        self.matched = 0
+        self.new_clusters = 0
+        if path:
+            self._load()
+
+    # ── Signatures ─────────────────────────────────────────────────────────
+
+    def signature(self, title: str, description: str = "", source: str = "") -> Optional[np.ndarray]:
+        """MinHash signature (uint32), or None for text without words."""
+        grams = shingles(normalize(title, description, source))
+        if not grams:
+            return None
+        x = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        x %= _PRIME
+        return ((self._a[:, None] * x[None, :] + self._b[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray):
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    # ── Index ──────────────────────────────────────────────────────────────
+
+    def query(self, sig: np.ndarray) -> Optional[Tuple[int, float]]:
+        """(cluster id, estimated similarity) of the closest indexed incident above the threshold."""
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(sig):
+                candidates.update(self._buckets.get(key, ()))
+            best = None
+            for incident_id in candidates:
+                cluster, other = self._entries[incident_id]
+                similarity = float(np.mean(other == sig))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (cluster, similarity)
+            return best
+
+    def add_many(self, entries: Iterable[Tuple[int, int, np.ndarray]]):
+        """Indexes (incident id, cluster id, signature) entries and appends them to the file."""
+        entries = list(entries)
+        with self._lock:
+            for incident_id, cluster_id, sig in entries:
+                self._insert(incident_id, cluster_id, sig)
+            if self.path and entries:
+                self._append(entries)
+
+    def cluster_batch(self, sigs: List[Optional[np.ndarray]],
+                      live_clusters: Optional[Callable[[Set[int]], Set[int]]] = None) -> List[Tuple[Optional[int], int]]:
+        """
+        Clusters a batch of new incidents, in order. For item i returns
+        (cluster id, i) when it joins an indexed cluster, or (None, j) when it
+        belongs to a new cluster whose first member is batch item j (j == i
+        for the first member itself). Callers add the stored rows with
+        add_many once their ids are known.
+
+        `live_clusters`, given the cluster ids the batch matched, returns the
+        ones whose head row still exists; entries of the others are dropped
+        and their matches looked up again.
+        """
+        matches = [self.query(sig) if sig is not None else None for sig in sigs]
+        checked = set()
+        while live_clusters is not None:
+            ids = {match[0] for match in matches if match is not None} - checked
+            if not ids:
+                break
+            live = set(live_clusters(ids))
+            checked |= live
+            stale = ids - live
+            if stale:
+                print(f"Near-duplicate index: dropping {len(stale)} clusters no longer stored")
+                self.discard_clusters(stale)
+                matches = [self.query(sig) if match is not None and match[0] in stale else match
+                           for sig, match in zip(sigs, matches)]
+
+        local = NearDuplicateIndex(path=None, num_perm=self.num_perm, bands=self.bands,
+                                   threshold=self.threshold, max_items=len(sigs) + 1, seed=self.seed)
+        refs = []
+        for i, (sig, match) in enumerate(zip(sigs, matches)):
+            if match is not None:
+                self.matched += 1
+                refs.append((match[0], i))
+                continue
+            head = local.query(sig) if sig is not None else None
+            if head is None:
+                self.new_clusters += 1
+                head = (i, 1.0)
+            else:
+                self.matched += 1
+            if sig is not None:
+                local.add_many([(i, head[0], sig)])
+            refs.append((None, head[0]))
+        return refs
+
+    def discard_clusters(self, cluster_ids: Set[int]):
+        """Removes every entry of the given clusters and rewrites the file without them."""
+        with self._lock:
+            for incident_id in [i for i, (cluster, _) in self._entries.items() if cluster in cluster_ids]:
+                self._remove(incident_id)
+            if self.path:
+                self._compact()
+
+    def _insert(self, incident_id, cluster_id, sig):
+        if incident_id in self._entries:
+            self._remove(incident_id)
+        self._entries[incident_id] = (cluster_id, sig)
+        for key in self._band_keys(sig):
+            self._buckets.setdefault(key, set()).add(incident_id)
+        while len(self._entries) > self.max_items:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, incident_id):
+        _, sig = self._entries.pop(incident_id)
+        for key in self._band_keys(sig):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(incident_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "indexed": len(self._entries),
+            "buckets": len(self._buckets),
+            "matched": self.matched,
+            "new_clusters": self.new_clusters,
+            "threshold": self.threshold,
+        }
+
+    # ── Persistence ────────────────────────────────────────────────────────
+
+    def _meta(self):
+        return {"num_perm": self.num_perm, "seed": self.seed}
+
+    def _append(self, entries):
+        records = np.zeros(len(entries), dtype=self._record)
+        for i, (incident_id, cluster_id, sig) in enumerate(entries):
+            records[i] = (incident_id, cluster_id, sig)
+        if not os.path.exists(self.path + ".json"):
+            with open(self.path + ".json", "w", encoding="utf-8") as f:
+                json.dump(self._meta(), f)
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+
+    def _load(self):
+        try:
+            with open(self.path + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except (FileNotFoundError, ValueError):
+            return
+        if meta != self._meta():
+            # Signatures from other hash functions are not comparable: start over
+            print(f"Near-duplicate index {self.path} was built with {meta}; discarding it")
+            self._reset_files()
+            return
+        usable = len(raw) - len(raw) % self._record.itemsize   # drop a torn last record
+        records = np.frombuffer(raw[:usable], dtype=self._record)
+        for record in records[-self.max_items:]:
+            self._insert(int(record["id"]), int(record["cluster"]), record["sig"].copy())
+        if len(records) > 2 * self.max_items or usable != len(raw):
+            self._compact()
+
+    def _compact(self):
+        tmp = f"{self.path}.tmp-{os.getpid()}"
+        records = np.zeros(len(self._entries), dtype=self._record)
+        for i, (incident_id, (cluster_id, sig)) in enumerate(self._entries.items()):
+            records[i] = (incident_id, cluster_id, sig)
+        with open(tmp, "wb") as f:
+            f.write(records.tobytes())
+        os.replace(tmp, self.path)
+
+    def _reset_files(self):
+        for path in (self.path, self.path + ".json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
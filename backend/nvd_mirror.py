@@ -0,0 +1,386 @@
+"""
+Local NVD mirror for offline CVE search.
+
+CVE records from the NVD 2.0 API are stored in a dedicated SQLite file
+(NVD_MIRROR_PATH, default backend/nvd_mirror.db):
+
+    cves        one row per CVE; indexed cvss_score, severity, published
+    cves_fts    FTS5 index over cve_id + description (external content,
+                kept in step with cves by triggers)
+    sync_state  sync watermarks
+
+/api/ai-cve-search queries the mirror first and only calls the live API
+when the mirror has no match. The mirror is filled and kept current by
+`sync_mirror`: the first run pages through the whole catalogue (resumable),
+later runs fetch only CVEs modified since the last watermark. main.py
+schedules it when NVD_MIRROR_SYNC_MINUTES > 0.
+
+Usage (from backend):
+    python nvd_mirror.py sync                 # bootstrap or incremental
+    python nvd_mirror.py import page1.json ...  # saved NVD 2.0 API responses (.json/.json.gz)
+    python nvd_mirror.py search "apache remote code execution"
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from rate_limit import TokenBucket
+
+NVD_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
+NVD_MIRROR_PATH = os.getenv("NVD_MIRROR_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "nvd_mirror.db"
+)
+NVD_API_KEY = os.getenv("NVD_API_KEY", "")
+
+SYNC_PAGE_SIZE = 2000         # NVD maximum
+MAX_RANGE_DAYS = 120          # NVD maximum lastModStartDate..lastModEndDate span
+# NVD allows 5 requests per rolling 30 s without an API key, 50 with one.
+# Every NVD call in the process (mirror sync and live search) shares this budget
+NVD_RATE_LIMIT = int(os.getenv("NVD_RATE_LIMIT") or (50 if NVD_API_KEY else 5))
+NVD_RATE_WINDOW_S = 30
+nvd_rate_limiter = TokenBucket.for_window(NVD_RATE_LIMIT, NVD_RATE_WINDOW_S)
+SYNC_TIMEOUT = 60             # seconds; 2000-record pages are large
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cves (
+    id            INTEGER PRIMARY KEY,
+    cve_id        TEXT NOT NULL UNIQUE,
+    description   TEXT NOT NULL,
+    cvss_score    REAL,
+    severity      TEXT NOT NULL,
+    published     TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_cves_cvss ON cves(cvss_score);
+CREATE INDEX IF NOT EXISTS ix_cves_severity ON cves(severity);
+CREATE INDEX IF NOT EXISTS ix_cves_published ON cves(published);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS cves_fts USING fts5(
+    cve_id, description, content='cves', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS cves_ai AFTER INSERT ON cves BEGIN
+    INSERT INTO cves_fts(rowid, cve_id, description) VALUES (new.id, new.cve_id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS cves_ad AFTER DELETE ON cves BEGIN
+    INSERT INTO cves_fts(cves_fts, rowid, cve_id, description)
+    VALUES ('delete', old.id, old.cve_id, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS cves_au AFTER UPDATE ON cves BEGIN
+    INSERT INTO cves_fts(cves_fts, rowid, cve_id, description)
+    VALUES ('delete', old.id, old.cve_id, old.description);
+    INSERT INTO cves_fts(rowid, cve_id, description) VALUES (new.id, new.cve_id, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# ── NVD record helpers ─────────────────────────────────────────────────────────
+
+def parse_cvss(cve_item: dict) -> Optional[float]:
+    """Try CVSS 3.1 → 3.0 → 2.0 in order."""
+    metrics = cve_item.get("metrics", {})
+
+    for key in ("cvssMetricV31", "cvssMetricV30"):
+        entries = metrics.get(key, [])
+        if entries:
+            return entries[0].get("cvssData", {}).get("baseScore")
+
+    entries = metrics.get("cvssMetricV2", [])
+    if entries:
+        return entries[0].get("cvssData", {}).get("baseScore")
+
+    return None
+
+
+def severity_from_score(score: Optional[float]) -> str:
+    if score is None:
+        return "UNKNOWN"
+    if score >= 9.0:
+        return "CRITICAL"
+    if score >= 7.0:
+        return "HIGH"
+    if score >= 4.0:
+        return "MEDIUM"
+    return "LOW"
+
+
+def english_description(cve_item: dict) -> str:
+    descriptions = cve_item.get("descriptions", [])
+    for d in descriptions:
+        if d.get("lang") == "en":
+            return d.get("value", "")
+    return descriptions[0].get("value", "") if descriptions else ""
+
+
+def _row(cve_item: dict) -> tuple:
+    score = parse_cvss(cve_item)
+    return (
+        cve_item.get("id", ""),
+        english_description(cve_item),
+        score,
+        severity_from_score(score),
+        cve_item.get("published", "")[:10],
+        cve_item.get("lastModified", ""),
+    )
+
+
+def _match_expression(keywords: str) -> str:
+    # Every keyword must match (NVD keywordSearch semantics); each is quoted
+    # so FTS5 treats punctuation like "node.js" as a phrase, not syntax
+    tokens = [t for t in keywords.lower().split() if any(c.isalnum() for c in t)]
+    return " AND ".join('"' + t.replace('"', '""') + '"' for t in tokens)
+
+
+# ── Storage ────────────────────────────────────────────────────────────────────
+
+class NVDMirror:
+    def __init__(self, path=NVD_MIRROR_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per-thread; searches run via asyncio.to_thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM cves").fetchone()[0]
+
+    def upsert(self, vulnerabilities: list) -> int:
+        """Insert or refresh NVD 2.0 `vulnerabilities` entries. Returns rows written."""
+        rows = [_row(v.get("cve", {})) for v in vulnerabilities]
+        rows = [r for r in rows if r[0]]
+        if not rows:
+            return 0
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO cves (cve_id, description, cvss_score, severity, published, last_modified)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(cve_id) DO UPDATE SET
+                        description = excluded.description,
+                        cvss_score = excluded.cvss_score,
+                        severity = excluded.severity,
+                        published = excluded.published,
+                        last_modified = excluded.last_modified
+                    WHERE excluded.last_modified >= cves.last_modified OR cves.last_modified IS NULL
+                    """,
+                    rows,
+                )
+        return len(rows)
+
+    def get_state(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: Optional[str]):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                if value is None:
+                    conn.execute("DELETE FROM sync_state WHERE key = ?", (key,))
+                else:
+                    conn.execute(
+                        "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                        (key, value),
+                    )
+
+    def get(self, cve_ids: list) -> dict:
+        """Rows for the given CVE ids, as {cve_id: row dict}; unknown ids are skipped."""
+        conn = self._conn()
+        found = {}
+        for i in range(0, len(cve_ids), 500):
+            chunk = cve_ids[i:i + 500]
+            cursor = conn.execute(
+                "SELECT cve_id, description, cvss_score, severity, published FROM cves "
+                f"WHERE cve_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            columns = [d[0] for d in cursor.description]
+            for row in cursor.fetchall():
+                found[row[0]] = dict(zip(columns, row))
+        return found
+
+    def search(self, keywords: str, start: int = 0, limit: int = 20) -> tuple:
+        """
+        Full-text search. Returns (total_matches, rows) where rows are dicts
+        with cve_id, description, cvss_score, severity and published, best
+        BM25 match first, for the page [start, start + limit).
+        """
+        match = _match_expression(keywords)
+        if not match:
+            return 0, []
+        conn = self._conn()
+        total = conn.execute("SELECT count(*) FROM cves_fts WHERE cves_fts MATCH ?", (match,)).fetchone()[0]
+        if not total:
+            return 0, []
+        cursor = conn.execute(
+            """
+            SELECT c.cve_id, c.description, c.cvss_score, c.severity, c.published
+            FROM (
+                SELECT rowid, rank FROM cves_fts WHERE cves_fts MATCH ?
+                ORDER BY rank LIMIT ? OFFSET ?
+            ) AS hits
+            JOIN cves c ON c.id = hits.rowid
+            ORDER BY hits.rank, c.id
+            """,
+            (match, limit, start),
+        )
+        columns = [d[0] for d in cursor.description]
+        return total, [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+_mirror: Optional[NVDMirror] = None
+
+
+def get_mirror() -> Optional[NVDMirror]:
+    """The process-wide mirror, or None until a sync or import has created it."""
+    global _mirror
+    if not os.path.exists(NVD_MIRROR_PATH):
+        return None
+    if _mirror is None:
+        _mirror = NVDMirror(NVD_MIRROR_PATH)
+    return _mirror
+
+
+# ── Sync ───────────────────────────────────────────────────────────────────────
+
+_sync_lock = asyncio.Lock()
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="milliseconds")
+
+
+async def _fetch_page(params: dict) -> dict:
+    from http_client import get_client
+
+    headers = {"User-Agent": "CTIIndia-Platform/1.0"}
+    if NVD_API_KEY:
+        headers["apiKey"] = NVD_API_KEY
+    await nvd_rate_limiter.acquire()
+    resp = await get_client().get(NVD_URL, params=params, headers=headers, timeout=SYNC_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _sync_pages(mirror: NVDMirror, base_params: dict, progress_key: Optional[str] = None) -> int:
+    """Pages through one NVD query into the mirror. Returns rows written."""
+    start = int(mirror.get_state(progress_key) or 0) if progress_key else 0
+    written = 0
+    while True:
+        raw = await _fetch_page({**base_params, "startIndex": start, "resultsPerPage": SYNC_PAGE_SIZE})
+        items = raw.get("vulnerabilities", [])
+        written += await asyncio.to_thread(mirror.upsert, items)
+        start += len(items)
+        if progress_key:
+            await asyncio.to_thread(mirror.set_state, progress_key, str(start))
+        if not items or start >= raw.get("totalResults", 0):
+            return written
+
+
+async def sync_mirror(mirror: Optional[NVDMirror] = None, now: Optional[datetime] = None) -> dict:
+    """
+    Bootstraps an empty mirror from the full catalogue, otherwise pulls every
+    CVE modified since the last watermark in windows of at most 120 days.
+    Progress is stored after each page/window, so an interrupted run resumes.
+    """
+    if _sync_lock.locked():
+        return {"status": "already_running"}
+    async with _sync_lock:
+        mirror = mirror or get_mirror() or NVDMirror(NVD_MIRROR_PATH)
+        now = now or datetime.now(timezone.utc)
+        watermark = await asyncio.to_thread(mirror.get_state, "last_modified_watermark")
+
+        if watermark is None:
+            # The bootstrap's own start time becomes the first watermark, so
+            # changes made while it runs are picked up incrementally
+            started = await asyncio.to_thread(mirror.get_state, "bootstrap_started_at") or _iso(now)
+            await asyncio.to_thread(mirror.set_state, "bootstrap_started_at", started)
+            written = await _sync_pages(mirror, {}, progress_key="bootstrap_next_index")
+            await asyncio.to_thread(mirror.set_state, "last_modified_watermark", started)
+            await asyncio.to_thread(mirror.set_state, "bootstrap_next_index", None)
+            await asyncio.to_thread(mirror.set_state, "bootstrap_started_at", None)
+            return {"status": "bootstrapped", "written": written}
+
+        window_start = datetime.fromisoformat(watermark)
+        written = 0
+        while window_start < now:
+            window_end = min(now, window_start + timedelta(days=MAX_RANGE_DAYS))
+            written += await _sync_pages(mirror, {
+                "lastModStartDate": _iso(window_start),
+                "lastModEndDate": _iso(window_end),
+            })
+            await asyncio.to_thread(mirror.set_state, "last_modified_watermark", _iso(window_end))
+            window_start = window_end
+        return {"status": "incremental", "written": written}
+
+
+async def sync_mirror_job():
+    """APScheduler entry point; failures are logged and retried next interval."""
+    try:
+        result = await sync_mirror()
+        print(f"NVD mirror sync: {result}")
+    except Exception as e:
+        print(f"NVD mirror sync failed: {e}")
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+
+def _load_json(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local NVD mirror")
+    parser.add_argument("--path", default=NVD_MIRROR_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="bootstrap or incrementally update from the NVD API")
+    imp = sub.add_parser("import", help="load saved NVD 2.0 API responses")
+    imp.add_argument("files", nargs="+")
+    srch = sub.add_parser("search", help="full-text search the mirror")
+    srch.add_argument("keywords")
+    srch.add_argument("--start", type=int, default=0)
+    args = parser.parse_args()
+
+    mirror = NVDMirror(args.path)
+    if args.command == "sync":
+        print(asyncio.run(sync_mirror(mirror)))
+    elif args.command == "import":
+        for path in args.files:
+            written = mirror.upsert(_load_json(path).get("vulnerabilities", []))
+            print(f"{path}: {written} CVEs")
+        print(f"Mirror now holds {mirror.count()} CVEs")
+    else:
+        total, rows = mirror.search(args.keywords, start=args.start)
+        print(f"{total} matches")
+        for row in rows:
+            print(f"  {row['cve_id']:<18} {row['severity']:<9} {row['published']}  {row['description'][:80]}")
+
+
+if __name__ == "__main__":
+    main()
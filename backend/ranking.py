@@ -0,0 +1,180 @@
+"""
+Vectorized relevance ranking for CVE search results.
+
+A candidate set is scored in one shot, with no per-document state, so a
+first-seen page costs the same as a repeated one:
+
+    score = keyword_weight  * (#query tokens found in description + in CVE id)
+          + cvss_weight     * cvss / 10
+          + severity_bonus[severity]
+          + recency_weight  * max(0, recency_years - age_days / 365)
+
+Keyword hits are whole-word matches. The texts of the batch are joined,
+lowercased and passed through one bytes.translate() that keeps ASCII letters
+and digits and turns everything else into a space; a query token is a hit
+where " token " occurs in the result. Query tokens go through the same
+table, so "cross-site" also matches "cross site" and "cross/site", and
+"apache" matches "org.apache.struts". token_hits() runs the same test for
+callers that report which keywords matched.
+
+Weights come from the RANK_* environment variables (defaults reproduce the
+original ranker's constants) or can be passed in explicitly.
+"""
+import operator
+import os
+import re
+from datetime import date, datetime, timezone
+from itertools import repeat
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+(?:[./#_-][a-z0-9]+)*')
+_EPOCH = date(1970, 1, 1)
+_SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN")
+
+# A-Z folded to a-z, a-z and 0-9 kept, "\n" kept to separate the texts of a
+# batch, every other byte (non-ASCII ones too) a space
+_BYTE_TABLE = bytes(
+    c + 32 if 65 <= c <= 90 else c if 48 <= c <= 57 or 97 <= c <= 122 or c == 10 else 32
+    for c in range(256)
+)
+# Lower bounds of the score terms (keyword hits, CVSS, severity bonus, days
+# left in the recency window); the severity bonus may be negative
+_TERM_BOUNDS = np.array([[0.0], [0.0], [-np.inf], [0.0]])
+
+
+def _parse_severity_bonus(spec):
+    bonus = dict.fromkeys(_SEVERITIES, 0.0)
+    for part in spec.split(","):
+        if ":" in part:
+            name, value = part.split(":", 1)
+            bonus[name.strip().upper()] = float(value)
+    return bonus
+
+
+DEFAULT_WEIGHTS = {
+    "keyword": float(os.getenv("RANK_KEYWORD_WEIGHT", "4")),
+    "cvss": float(os.getenv("RANK_CVSS_WEIGHT", "2")),
+    "severity_bonus": _parse_severity_bonus(os.getenv("RANK_SEVERITY_BONUS", "CRITICAL:3,HIGH:2,MEDIUM:1")),
+    "recency": float(os.getenv("RANK_RECENCY_WEIGHT", "1")),
+    "recency_years": float(os.getenv("RANK_RECENCY_YEARS", "3")),
+}
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _epoch_days(published):
+    try:
+        return (date.fromisoformat((published or "")[:10]) - _EPOCH).days
+    except ValueError:
+        return None
+
+
+def _epoch_days_array(values):
+    """
+    Published dates as float epoch days. A missing or unparseable date is NaN,
+    or, when NumPy parsed the batch, NaT as a float (about -9.2e18): either
+    way far outside any recency window.
+    """
+    try:
+        # One C pass for the usual "YYYY-MM-DD[Thh:mm...]" / empty values
+        return np.array(values, dtype="datetime64[D]").astype(np.float64)
+    except (TypeError, ValueError):
+        return np.array([np.nan if (d := _epoch_days(v)) is None else d for v in values], dtype=np.float64)
+
+
+def _column(items, key, default=None):
+    # dict.get through map() runs in C, with no Python frame per item
+    return list(map(dict.get, items, repeat(key), repeat(default)))
+
+
+def _texts(items, key):
+    texts = _column(items, key, "")
+    return [text or "" for text in texts] if None in texts else texts
+
+
+def _normalized(texts):
+    """
+    Each text as " word word ... ": lowercased, every byte that is not an
+    ASCII letter or digit a space. One translate() over the joined batch.
+    """
+    if not texts:
+        return []
+    joined = " " + " \n ".join(texts) + " "
+    if not joined.isascii():
+        # Unicode lowercasing can yield ASCII letters ("K" -> "k"), as in tokenize()
+        joined = joined.lower()
+    docs = joined.encode("utf-8").translate(_BYTE_TABLE).decode("ascii").split("\n")
+    if len(docs) != len(texts):
+        # Some text had a newline of its own
+        return _normalized([text.replace("\n", " ") for text in texts])
+    return docs
+
+
+def token_hits(texts, tokens):
+    """
+    (len(texts), len(tokens)) bool matrix: True where tokens[j] occurs in
+    texts[i] as whole words. A hit is a substring test run by map() in C.
+    """
+    hits = np.zeros((len(texts), len(tokens)), dtype=bool)
+    if len(texts) and len(tokens):
+        docs = _normalized(texts)
+        for j, pattern in enumerate(_normalized(tokens)):
+            hits[:, j] = np.fromiter(map(operator.contains, docs, repeat(pattern)), dtype=bool, count=len(docs))
+    return hits
+
+
+def _hit_counts(texts, tokens):
+    """Number of `tokens` that occur in each text, as in token_hits()."""
+    if not tokens:
+        return np.zeros(len(texts), dtype=np.int64)
+    docs = _normalized(texts)
+    found = [map(operator.contains, docs, repeat(pattern)) for pattern in _normalized(tokens)]
+    # zip() walks the per-token tests side by side, so each text is summed once
+    return np.fromiter(map(sum, zip(*found)), dtype=np.int64, count=len(docs))
+
+
+class RankingEngine:
+    def __init__(self, weights=None):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def score(self, items, keywords, now=None):
+        """Relevance score per item, as a float64 array aligned with `items`."""
+        n = len(items)
+        if n == 0:
+            return np.empty(0)
+        w = self.weights
+        bonus = w["severity_bonus"]
+        today = ((now or datetime.now(timezone.utc)).date() - _EPOCH).days
+
+        # Description and CVE id are matched separately, so a token in both
+        # counts twice, as in the original ranker
+        tokens = list(dict.fromkeys(tokenize(keywords)))
+        hits = _hit_counts(_texts(items, "description"), tokens)
+        cve_ids = _texts(items, "cve_id")
+        # Query words are rarely part of a CVE id: only the tokens found in
+        # the joined ids at all need the per-id pass
+        joined_ids = _normalized([" ".join(cve_ids)])[0]
+        id_tokens = [token for token, pattern in zip(tokens, _normalized(tokens)) if pattern in joined_ids]
+        if id_tokens:
+            hits += _hit_counts(cve_ids, id_tokens)
+        severity_bonus = np.fromiter(
+            map(bonus.get, _column(items, "severity"), repeat(bonus.get("UNKNOWN", 0.0))), dtype=np.float64, count=n
+        )
+        # One row per term; the recency term is kept as the days left in the
+        # window, 365 * (recency_years - age_days / 365). fmax applies the
+        # lower bounds and also turns NaN (no CVSS score, no publish date) into 0
+        terms = np.fmax(np.array([
+            hits,
+            np.array(_column(items, "cvss_score"), dtype=np.float64),
+            severity_bonus,
+            _epoch_days_array(_column(items, "published")) - (today - 365 * w["recency_years"]),
+        ]), _TERM_BOUNDS)
+        return np.array([w["keyword"], w["cvss"] / 10, 1.0, w["recency"] / 365]).dot(terms)
+
+    def rank(self, items, keywords, now=None):
+        """Items sorted best first; ties keep their input order."""
+        order = np.argsort(-self.score(items, keywords, now=now), kind="stable")
+        return list(map(items.__getitem__, order.tolist()))
@@ -0,0 +1,63 @@
+"""
+Async token-bucket rate limiter.
+
+The bucket holds up to `capacity` tokens and refills at `rate` tokens per
+second; `acquire()` waits until a token is available. Waiters are served in
+arrival order, so concurrent page fetches share the budget fairly.
+
+To stay under a "limit requests per rolling window" quota (as NVD
+documents), use `TokenBucket.for_window(limit, window)`: the refill rate is
+chosen so that burst + refill never exceeds `limit` in any window.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = None  # created lazily inside the running event loop
+
+        self.acquired = 0
+        self.waited_s = 0.0
+
+    @classmethod
+    def for_window(cls, limit, window, clock=time.monotonic):
+        if limit < 1 or window <= 0:
+            raise ValueError("limit must be >= 1 and window > 0")
+        # Leave at least one request of the quota to the refill; a limit of
+        # one still gets a bucket of one refilled once per window
+        capacity = max(1, min(limit // 10, limit - 1))
+        return cls(rate=max(1, limit - capacity) / window, capacity=capacity, clock=clock)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                self.waited_s += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= 1
+            self.acquired += 1
+
+    def stats(self):
+        return {
+            "rate_per_s": round(self.rate, 3),
+            "capacity": self.capacity,
+            "acquired": self.acquired,
+            "waited_s": round(self.waited_s, 1),
+        }
@@ -4,18 +4,44 @@ POST /api/ai-cve-search
 
 Query flow:
   1. Extract smart keywords from natural language input
-  2. Call NVD API 2.0 with keyword
+  2. Search the local NVD mirror; call NVD API 2.0 with keyword only on a miss
+     (mode="semantic": nearest CVEs by MiniLM embedding, blended with the ranker)
   3. Rank/filter results
   4. Return top 20 enriched CVEs
+
+POST /api/ai-cve-search/stream exports deep results (up to NVD_STREAM_MAX_RESULTS)
+as NDJSON: NVD pages are fetched in parallel under the shared NVD rate limit,
+ranked per page and sent as they arrive, each with a cursor to resume from.
+
+Ranked result pages are cached per (keywords, start index) with a TTL and a
+stale-while-revalidate window, so repeated analyst queries skip NVD entirely.
 """
 
+import os
 import re
+import json
+import base64
+import collections
 import httpx
 import asyncio
-from datetime import datetime, timezone
+import numpy as np
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from http_client import get_client
+from ttl_cache import TTLCache, STALE
+from singleflight import singleflight
+from semantic_search import get_index, embed_query
+from ranking import RankingEngine, token_hits, tokenize
+from nvd_mirror import (
+    NVD_API_KEY,
+    get_mirror,
+    nvd_rate_limiter,
+    english_description,
+    parse_cvss as _parse_cvss,
+    severity_from_score as _severity_from_score,
+)
 
 router = APIRouter()
 
@@ -96,16 +122,72 @@ _NOISE_WORDS = {
     "vulnerability", "cves", "cve", "issues", "bugs",
 }
 
+# Optional JSON object of extra {"term": "expansion"} pairs, merged over the
+# built-in map once at startup
+SYNONYMS_FILE = os.getenv("SYNONYMS_FILE", "")
+
+
+def _load_synonyms(path: str) -> Dict[str, str]:
+    synonyms = dict(_SYNONYM_MAP)
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                extra = json.load(f)
+            synonyms.update({k.lower().strip(): v for k, v in extra.items() if k.strip()})
+        except Exception as e:
+            print(f"Could not load synonyms from {path}, using built-ins only: {e}")
+    return synonyms
+
+
+def _compile_synonyms(synonyms: Dict[str, str]):
+    # One alternation, longest terms first: at each position the regex takes
+    # the longest synonym that still ends on a word boundary
+    terms = sorted(synonyms, key=len, reverse=True)
+    return re.compile(r'\b(?:' + "|".join(re.escape(t) for t in terms) + r')\b') if terms else None
+
+
+_SYNONYMS   = _load_synonyms(SYNONYMS_FILE)
+_SYNONYM_RE = _compile_synonyms(_SYNONYMS)
+
 NVD_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
 RESULTS_PER_QUERY = 30    # fetch from NVD; we trim to 20 after ranking
 MAX_RETRIES = 2
 TIMEOUT = 15              # seconds
+RESULTS_RETURNED = 20
+
+# Ranked-result cache: fresh for NVD_CACHE_TTL_S, then served stale (while
+# one background refresh runs) for up to NVD_CACHE_STALE_S more
+NVD_CACHE_SIZE = int(os.getenv("NVD_CACHE_SIZE", "512"))
+NVD_CACHE_TTL_S = float(os.getenv("NVD_CACHE_TTL_S", "900"))
+NVD_CACHE_STALE_S = float(os.getenv("NVD_CACHE_STALE_S", "3600"))
+
+# Semantic mode: the SEMANTIC_CANDIDATES nearest CVEs are re-ranked by
+# SEMANTIC_WEIGHT * cosine + (1 - SEMANTIC_WEIGHT) * normalised keyword score
+SEMANTIC_CANDIDATES = int(os.getenv("SEMANTIC_CANDIDATES", "200"))
+SEMANTIC_WEIGHT = float(os.getenv("SEMANTIC_WEIGHT", "0.7"))
+
+# Streaming export (/ai-cve-search/stream): pages of NVD_STREAM_PAGE_SIZE are
+# fetched up to NVD_STREAM_CONCURRENCY at a time, within the NVD rate limit
+NVD_STREAM_PAGE_SIZE = int(os.getenv("NVD_STREAM_PAGE_SIZE", "500"))    # NVD maximum is 2000
+NVD_STREAM_CONCURRENCY = int(os.getenv("NVD_STREAM_CONCURRENCY", "4"))
+NVD_STREAM_MAX_RESULTS = int(os.getenv("NVD_STREAM_MAX_RESULTS", "10000"))
+
+_search_cache = TTLCache(maxsize=NVD_CACHE_SIZE, ttl=NVD_CACHE_TTL_S, stale_ttl=NVD_CACHE_STALE_S)
+_background_tasks = set()
 
 
 # ── Pydantic Models ────────────────────────────────────────────────────────────
 
 class CVESearchRequest(BaseModel):
     query: str = Field(..., min_length=2, max_length=300)
+    start_index: int = Field(0, ge=0)
+    mode: str = Field("keyword", pattern="^(keyword|semantic)$")
+
+
+class CVEStreamRequest(BaseModel):
+    query: Optional[str] = Field(None, min_length=2, max_length=300)
+    cursor: Optional[str] = None      # from a previous stream, to resume after its last page
+    max_results: int = Field(1000, ge=1, le=NVD_STREAM_MAX_RESULTS)
 
 
 class CVEResult(BaseModel):
@@ -123,6 +205,7 @@ class CVESearchResponse(BaseModel):
     keywords_used: str
     total_found: int
     results: List[CVEResult]
+    source: str = "nvd"
 
 
 # ── Keyword extractor ──────────────────────────────────────────────────────────
@@ -134,11 +217,9 @@ def _extract_keywords(raw: str) -> str:
     """
     text = raw.lower().strip()
 
-    # Replace known synonyms (longest match first)
-    sorted_syns = sorted(_SYNONYM_MAP.keys(), key=len, reverse=True)
-    for syn in sorted_syns:
-        replacement = _SYNONYM_MAP[syn]
-        text = re.sub(r'\b' + re.escape(syn) + r'\b', replacement, text)
+    # Replace known synonyms in one left-to-right pass (longest match first)
+    if _SYNONYM_RE is not None:
+        text = _SYNONYM_RE.sub(lambda m: _SYNONYMS[m.group(0)], text)
 
     # Tokenise and drop noise words
     tokens = re.findall(r'[a-z0-9./#_-]+', text)
@@ -154,134 +235,317 @@ def _extract_keywords(raw: str) -> str:
     return " ".join(unique) if unique else raw.strip()
 
 
-# ── CVSS helpers ───────────────────────────────────────────────────────────────
-
-def _parse_cvss(cve_item: dict) -> Optional[float]:
-    """Try CVSS 3.1 → 3.0 → 2.0 in order."""
-    metrics = cve_item.get("metrics", {})
-
-    for key in ("cvssMetricV31", "cvssMetricV30"):
-        entries = metrics.get(key, [])
-        if entries:
-            return entries[0].get("cvssData", {}).get("baseScore")
-
-    entries = metrics.get("cvssMetricV2", [])
-    if entries:
-        return entries[0].get("cvssData", {}).get("baseScore")
-
-    return None
-
-
-def _severity_from_score(score: Optional[float]) -> str:
-    if score is None:
-        return "UNKNOWN"
-    if score >= 9.0:
-        return "CRITICAL"
-    if score >= 7.0:
-        return "HIGH"
-    if score >= 4.0:
-        return "MEDIUM"
-    return "LOW"
-
-
 # ── Relevance ranker ───────────────────────────────────────────────────────────
 
-def _rank_results(results: list, keywords: str) -> list:
-    kw_tokens = set(keywords.lower().split())
-
-    def _score(item: dict) -> float:
-        desc  = (item.get("description") or "").lower()
-        cve_id = (item.get("cve_id") or "").lower()
-        score  = item.get("cvss_score") or 0.0
+# Scores a whole candidate set at once; weights come from RANK_* env vars
+_ranker = RankingEngine()
 
-        # keyword hits in description
-        kw_hits = sum(1 for k in kw_tokens if k in desc)
-        kw_hits += sum(1 for k in kw_tokens if k in cve_id)
 
-        # severity bonus
-        sev_bonus = {
-            "CRITICAL": 3.0,
-            "HIGH":     2.0,
-            "MEDIUM":   1.0,
-        }.get(item.get("severity", ""), 0.0)
-
-        # recency bonus (days old → less = better)
-        try:
-            pub_dt  = datetime.fromisoformat(item.get("published", "").replace("Z", "+00:00"))
-            now     = datetime.now(timezone.utc)
-            days_old = (now - pub_dt).days
-            recency = max(0.0, 3.0 - days_old / 365)
-        except Exception:
-            recency = 0.0
+def _rank_results(results: list, keywords: str) -> list:
+    return _ranker.rank(results, keywords)
 
-        return kw_hits * 4 + (score / 10 * 2) + sev_bonus + recency
 
-    return sorted(results, key=_score, reverse=True)
+def _query_tokens(keywords: str) -> list:
+    # Same tokens, in query order, as the ranker scores
+    return list(dict.fromkeys(tokenize(keywords)))
 
 
 # ── NVD caller ─────────────────────────────────────────────────────────────────
 
-async def _call_nvd(keyword: str, start: int = 0) -> dict:
+async def _request_nvd(keyword: str, start: int = 0, per_page: int = RESULTS_PER_QUERY) -> dict:
+    """
+    One NVD page. Rate-limit (403) and transport failures are retried up to
+    MAX_RETRIES times and then raised, never turned into an empty page, so a
+    failed call is not cached or streamed as "no results".
+    """
     params = {
         "keywordSearch": keyword,
         "startIndex":    start,
-        "resultsPerPage": RESULTS_PER_QUERY,
+        "resultsPerPage": per_page,
     }
     headers = {"User-Agent": "CTIIndia-Platform/1.0"}
+    if NVD_API_KEY:
+        headers["apiKey"] = NVD_API_KEY
 
     for attempt in range(MAX_RETRIES + 1):
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-                resp = await client.get(NVD_URL, params=params, headers=headers)
+            await nvd_rate_limiter.acquire()
+            resp = await get_client().get(NVD_URL, params=params, headers=headers, timeout=TIMEOUT)
             resp.raise_for_status()
-            return resp.json()
+            data = resp.json()
+            if not isinstance(data, dict) or "totalResults" not in data:
+                raise ValueError("NVD response has no totalResults")
+            return data
         except httpx.HTTPStatusError as e:
+            if attempt == MAX_RETRIES:
+                raise
             if e.response.status_code == 403:
                 # NVD rate-limit — back off
                 await asyncio.sleep(6)
-            elif attempt == MAX_RETRIES:
-                raise
         except Exception:
             if attempt == MAX_RETRIES:
                 raise
             await asyncio.sleep(2)
-    return {}
 
 
-def _parse_nvd_response(raw: dict, query_tokens: set) -> list:
-    parsed = []
+# Interactive searches coalesce identical concurrent calls. Stream pages call
+# _request_nvd directly: the shared task behind a single-flight call is
+# shielded, so a cancelled page would otherwise keep spending the rate budget.
+_call_nvd = singleflight(
+    key=lambda keyword, start=0, per_page=RESULTS_PER_QUERY: (keyword, start, per_page)
+)(_request_nvd)
+
+
+def _result_entry(cve_id: str, description: str, cvss_score: Optional[float],
+                  published: str, matched: list) -> dict:
+    return {
+        "cve_id":           cve_id,
+        "description":      description[:600] + ("…" if len(description) > 600 else ""),
+        "cvss_score":       cvss_score,
+        "severity":         _severity_from_score(cvss_score),
+        "published":        published,
+        "url":              f"https://nvd.nist.gov/vuln/detail/{cve_id}",
+        "keywords_matched": matched,
+    }
+
+
+def _result_entries(rows: list, query_tokens: list) -> list:
+    """
+    Result entries for (cve_id, description, cvss_score, published) rows.
+    keywords_matched uses the ranker's whole-word test, run over the full
+    descriptions and ids of the batch at once.
+    """
+    n = len(rows)
+    hits = token_hits([row[1] for row in rows] + [row[0] for row in rows], query_tokens)
+    matched = (hits[:n] | hits[n:]).tolist()
+    return [
+        _result_entry(*row, [k for k, hit in zip(query_tokens, row_hits) if hit])
+        for row, row_hits in zip(rows, matched)
+    ]
+
+
+def _mirror_entries(rows: list, query_tokens: list) -> list:
+    return _result_entries(
+        [(r["cve_id"], r["description"], r["cvss_score"], r["published"] or "") for r in rows], query_tokens
+    )
+
+
+def _parse_nvd_response(raw: dict, query_tokens: list) -> list:
+    rows = []
     for item in raw.get("vulnerabilities", []):
         cve = item.get("cve", {})
-        cve_id = cve.get("id", "")
-
-        # Description — prefer English
-        descriptions = cve.get("descriptions", [])
-        description  = ""
-        for d in descriptions:
-            if d.get("lang") == "en":
-                description = d.get("value", "")
-                break
-        if not description and descriptions:
-            description = descriptions[0].get("value", "")
+        rows.append((
+            cve.get("id", ""),
+            english_description(cve),  # prefer English
+            _parse_cvss(cve),
+            cve.get("published", "")[:10],
+        ))
+    return _result_entries(rows, query_tokens)
 
-        cvss_score = _parse_cvss(cve)
-        severity   = _severity_from_score(cvss_score)
-        published  = cve.get("published", "")[:10]
 
-        # Which keywords actually appear in description?
-        desc_lower = description.lower()
-        matched    = [k for k in query_tokens if k in desc_lower or k in cve_id.lower()]
+# ── Cached search ──────────────────────────────────────────────────────────────
 
-        parsed.append({
-            "cve_id":           cve_id,
-            "description":      description[:600] + ("…" if len(description) > 600 else ""),
-            "cvss_score":       cvss_score,
-            "severity":         severity,
-            "published":        published,
-            "url":              f"https://nvd.nist.gov/vuln/detail/{cve_id}",
-            "keywords_matched": matched,
-        })
-    return parsed
+def _cache_key(text: str, start: int, mode: str = "keyword") -> tuple:
+    return (mode, " ".join(text.lower().split()), start)
+
+
+async def _search_mirror(keywords: str, start: int) -> Optional[dict]:
+    """Page of ranked results from the local mirror, or None on a miss."""
+    mirror = get_mirror()
+    if mirror is None:
+        return None
+    try:
+        total, rows = await asyncio.to_thread(mirror.search, keywords, start, RESULTS_RETURNED)
+    except Exception as e:
+        print(f"NVD mirror search failed, falling back to the API: {e}")
+        return None
+    if not total:
+        return None
+
+    results = _mirror_entries(rows, _query_tokens(keywords))
+    return {
+        "keywords_used": keywords,
+        "total_found":  total,
+        "results":      _rank_results(results, keywords),
+        "source":       "mirror",
+    }
+
+
+async def _search_nvd(keywords: str, start: int = 0) -> dict:
+    """Mirror, else NVD call + parse + rank; the returned dict is what gets cached."""
+    mirrored = await _search_mirror(keywords, start)
+    if mirrored is not None:
+        return mirrored
+
+    raw = await _call_nvd(keywords, start)
+
+    query_tokens = _query_tokens(keywords)
+    results      = _parse_nvd_response(raw, query_tokens)
+    results      = _rank_results(results, keywords)
+    total_found  = raw.get("totalResults", len(results))
+
+    return {
+        "keywords_used": keywords,
+        "total_found":  total_found,
+        "results":      results[:RESULTS_RETURNED],
+        "source":       "nvd",
+    }
+
+
+async def _search_semantic(raw_query: str, keywords: str, start: int) -> Optional[dict]:
+    """Embedding search over the mirror, or None when no semantic index is built."""
+    index, mirror = get_index(), get_mirror()
+    if index is None or mirror is None:
+        return None
+
+    query_vec = await asyncio.to_thread(embed_query, raw_query)
+    hits      = await asyncio.to_thread(index.search, query_vec, SEMANTIC_CANDIDATES)
+    rows      = await asyncio.to_thread(mirror.get, [cve_id for cve_id, _ in hits])
+
+    similarities, found = [], []
+    for cve_id, similarity in hits:
+        r = rows.get(cve_id)
+        if r is None:
+            continue
+        similarities.append(similarity)
+        found.append(r)
+    entries = _mirror_entries(found, _query_tokens(keywords))
+    if not entries:
+        return None
+
+    # Keyword scores are unbounded; scale them to [0, 1] like cosine similarity
+    kw_scores = _ranker.score(entries, keywords)
+    top_kw    = kw_scores.max() or 1.0
+    blended   = SEMANTIC_WEIGHT * np.asarray(similarities) + (1 - SEMANTIC_WEIGHT) * kw_scores / top_kw
+    order     = np.argsort(-blended, kind="stable")
+    return {
+        "keywords_used": keywords,
+        "total_found":  len(entries),
+        "results":      [entries[i] for i in order[start:start + RESULTS_RETURNED]],
+        "source":       "semantic",
+    }
+
+
+async def _run_search(raw_query: str, keywords: str, start: int, mode: str) -> dict:
+    if mode == "semantic":
+        result = await _search_semantic(raw_query, keywords, start)
+        if result is not None:
+            return result
+    return await _search_nvd(keywords, start)
+
+
+async def _refresh_cached_search(key: tuple, raw_query: str, keywords: str, start: int, mode: str):
+    try:
+        _search_cache.set(key, await _run_search(raw_query, keywords, start, mode))
+    except Exception as e:
+        # Keep serving the stale page; the next stale hit retries
+        print(f"NVD cache refresh failed for {keywords!r}: {e}")
+    finally:
+        _search_cache.end_refresh(key)
+
+
+# ── Streaming export ───────────────────────────────────────────────────────────
+
+def _encode_cursor(keywords: str, next_index: int, source: str) -> str:
+    raw = json.dumps({"k": keywords, "i": next_index, "s": source}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not (isinstance(state["k"], str) and isinstance(state["i"], int)
+                and state["i"] >= 0 and state["s"] in ("mirror", "nvd")):
+            raise ValueError
+        return state
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+async def _mirror_pages(keywords: str, start: int, stop: int):
+    """Yields (page_start, total, results) from the local mirror."""
+    mirror = get_mirror()
+    query_tokens = _query_tokens(keywords)
+    for page_start in range(start, stop, NVD_STREAM_PAGE_SIZE):
+        limit = min(NVD_STREAM_PAGE_SIZE, stop - page_start)
+        total, rows = await asyncio.to_thread(mirror.search, keywords, page_start, limit)
+        yield page_start, total, _mirror_entries(rows, query_tokens)
+        if len(rows) < limit:
+            return
+
+
+async def _nvd_pages(keywords: str, start: int, stop: int):
+    """
+    Yields (page_start, total, results) from the NVD API. The first page gives
+    totalResults; later pages are fetched through a window of at most
+    NVD_STREAM_CONCURRENCY requests and yielded in index order. Each page
+    starts where the rows received so far end, so a cursor always marks a
+    contiguous prefix: after a short page the pages queued behind it are
+    cancelled and re-requested from the first missing row.
+    """
+    query_tokens = _query_tokens(keywords)
+    first = await _request_nvd(keywords, start, NVD_STREAM_PAGE_SIZE)
+    total = first.get("totalResults", 0)
+    results = _parse_nvd_response(first, query_tokens)
+    yield start, total, results
+
+    end = min(stop, total)
+    next_start = start + len(results)
+    queued = next_start
+    window = collections.deque()   # (page_start, task), oldest first
+    try:
+        while results and next_start < end:
+            while len(window) < NVD_STREAM_CONCURRENCY and queued < end:
+                task = asyncio.create_task(_request_nvd(keywords, queued, NVD_STREAM_PAGE_SIZE))
+                window.append((queued, task))
+                queued += NVD_STREAM_PAGE_SIZE
+            page_start, task = window.popleft()
+            results = _parse_nvd_response(await task, query_tokens)
+            yield page_start, total, results
+            next_start = page_start + len(results)
+            if results and next_start < min(page_start + NVD_STREAM_PAGE_SIZE, end):
+                for _, queued_task in window:
+                    queued_task.cancel()
+                window.clear()
+                queued = next_start
+    finally:
+        # Client went away or a page failed: stop the requests still queued
+        for _, task in window:
+            task.cancel()
+
+
+async def _stream_search(raw_query: str, keywords: str, start: int, max_results: int, source: str):
+    """NDJSON lines: one "meta", then a ranked "page" per fetched page, then "done" (or "error")."""
+    stop = start + max_results
+    pages = _mirror_pages(keywords, start, stop) if source == "mirror" else _nvd_pages(keywords, start, stop)
+    next_index, total, sent = start, None, 0
+    try:
+        async for page_start, total, results in pages:
+            if page_start == start:
+                yield json.dumps({"type": "meta", "query": raw_query, "keywords_used": keywords,
+                                  "total_found": total, "source": source}) + "\n"
+            results    = results[:stop - page_start]
+            next_index = page_start + len(results)
+            sent      += len(results)
+            cursor     = _encode_cursor(keywords, next_index, source) if next_index < total else None
+            yield json.dumps({"type": "page", "start": page_start, "cursor": cursor,
+                              "results": _rank_results(results, keywords)}) + "\n"
+            if not results:
+                break
+    except Exception as e:
+        if isinstance(e, httpx.HTTPStatusError):
+            detail = f"NVD API returned HTTP {e.response.status_code}. Resume with the cursor shortly."
+        else:
+            detail = f"Search failed: {str(e)}"
+        yield json.dumps({"type": "error", "detail": detail, "sent": sent,
+                          "cursor": _encode_cursor(keywords, next_index, source)}) + "\n"
+        return
+    finally:
+        await pages.aclose()
+
+    more = total is not None and next_index < total
+    yield json.dumps({"type": "done", "sent": sent,
+                      "cursor": _encode_cursor(keywords, next_index, source) if more else None}) + "\n"
 
 
 # ── Main endpoint ──────────────────────────────────────────────────────────────
@@ -294,8 +558,20 @@ async def ai_cve_search(payload: CVESearchRequest):
     if not keywords:
         raise HTTPException(status_code=400, detail="Could not extract valid keywords from query.")
 
+    start  = payload.start_index
+    mode   = payload.mode
+    # Semantic results depend on the whole query, not just its keywords
+    key    = _cache_key(raw_query if mode == "semantic" else keywords, start, mode)
+    cached, state = _search_cache.get(key)
+    if state == STALE and _search_cache.begin_refresh(key):
+        task = asyncio.create_task(_refresh_cached_search(key, raw_query, keywords, start, mode))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    if cached is not None:
+        return {"query": raw_query, **cached}
+
     try:
-        raw = await _call_nvd(keywords)
+        result = await _run_search(raw_query, keywords, start, mode)
     except httpx.HTTPStatusError as e:
         raise HTTPException(
             status_code=502,
@@ -304,14 +580,43 @@ async def ai_cve_search(payload: CVESearchRequest):
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"NVD API unreachable: {str(e)}")
 
-    query_tokens = set(keywords.lower().split())
-    results      = _parse_nvd_response(raw, query_tokens)
-    results      = _rank_results(results, keywords)
-    total_found  = raw.get("totalResults", len(results))
+    _search_cache.set(key, result)
+    return {"query": raw_query, **result}
+
 
+@router.post("/ai-cve-search/stream")
+async def ai_cve_search_stream(payload: CVEStreamRequest):
+    """
+    Deep results as NDJSON, streamed page by page (each page ranked on its
+    own). Pass the last "cursor" back to resume an interrupted export.
+    """
+    if payload.cursor:
+        state = _decode_cursor(payload.cursor)
+        raw_query, keywords, start, source = payload.query or state["k"], state["k"], state["i"], state["s"]
+        if source == "mirror" and get_mirror() is None:
+            raise HTTPException(status_code=409, detail="The NVD mirror behind this cursor is gone; start over.")
+    else:
+        if not payload.query:
+            raise HTTPException(status_code=400, detail="Either query or cursor is required.")
+        raw_query = payload.query.strip()
+        keywords  = _extract_keywords(raw_query)
+        if not keywords:
+            raise HTTPException(status_code=400, detail="Could not extract valid keywords from query.")
+        start  = 0
+        mirror = get_mirror()
+        hits   = (await asyncio.to_thread(mirror.search, keywords, 0, 1))[0] if mirror is not None else 0
+        source = "mirror" if hits else "nvd"
+
+    return StreamingResponse(
+        _stream_search(raw_query, keywords, start, payload.max_results, source),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/ai-cve-search/stats")
+async def ai_cve_search_stats():
     return {
-        "query":        raw_query,
-        "keywords_used": keywords,
-        "total_found":  total_found,
-        "results":      results[:20],
+        "cache": _search_cache.stats(),
+        "nvd_single_flight": _call_nvd.singleflight.stats(),
+        "nvd_rate_limit": nvd_rate_limiter.stats(),
     }
@@ -1,152 +1,177 @@
 import asyncio
-import httpx
-import feedparser
+import threading
 import warnings
 
 # Suppress SSL warnings when verify=False is used (Windows cert store issue)
 warnings.filterwarnings("ignore", message="Unverified HTTPS request")
 from datetime import datetime
-from email.utils import parsedate_to_datetime
 from fastapi import APIRouter, Depends
+from sqlalchemy import func, or_, update
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 from typing import List, Dict, Any
-import hashlib
 
 from database import get_db, SessionLocal
+from feeds import FeedEngine, load_sources
+from incident_classifier import IncidentClassifier
+from incident_store import link_hash, existing_ids, existing_link_hashes, incidents_by_link_hash, insert_incidents
 from models import Incident
+from near_duplicates import NearDuplicateIndex
 
 router = APIRouter()
 
 # -------------------------------------------------------------------------
 # CLASSIFICATION LOGIC
 # -------------------------------------------------------------------------
-def classify_incident(title: str, description: str, origin: str) -> tuple[str, str]:
-    text = (title + " " + description).lower()
-    
-    # Severity Classification
-    if "ransomware" in text or "breach" in text or "leak" in text or "attack confirmed" in text or origin == "URLHaus":
-        severity = "High"
-    elif "phishing" in text or "malware" in text or "vulnerability" in text or "exploit" in text:
-        severity = "Medium"
-    else:
-        severity = "Low"
-
-    # Sector Classification
-    if any(keyword in text for keyword in ["rbi", "bank", "upi", "payment"]):
-        sector = "Banking"
-    elif any(keyword in text for keyword in ["ministry", "gov.in", "nic"]):
-        sector = "Government"
-    elif any(keyword in text for keyword in ["power", "telecom", "airport", "oil"]):
-        sector = "Infrastructure"
-    else:
-        sector = "General"
-
-    return severity, sector
+# Severity / sector keyword rules: incident_rules.json (CLASSIFIER_RULES_FILE)
+_classifier = IncidentClassifier.from_file()
 
-# -------------------------------------------------------------------------
-# FETCHERS
-# -------------------------------------------------------------------------
-async def fetch_google_news() -> List[Dict[str, Any]]:
-    queries = ["cybersecurity India", "data breach India", "ransomware India"]
-    
-    async def fetch_and_parse(query):
-        results = []
-        url = f"https://news.google.com/rss/search?q={query.replace(' ', '+')}&hl=en-IN&gl=IN&ceid=IN:en"
-        try:
-            async with httpx.AsyncClient(timeout=5.0, verify=False) as client:
-                resp = await client.get(url)
-                if resp.status_code == 200:
-                    feed = feedparser.parse(resp.text)
-                    for entry in feed.entries[:5]: # limit to top 5 per query
-                        try:
-                            pub_date = parsedate_to_datetime(entry.published)
-                        except Exception:
-                            pub_date = datetime.utcnow()
-                        results.append({
-                            "title": entry.title,
-                            "source": entry.source.title if hasattr(entry, 'source') else "Google News",
-                            "link": entry.link,
-                            "description": entry.description,
-                            "origin": "Google News RSS",
-                            "published_at": pub_date
-                        })
-        except Exception as e:
-            print(f"Error fetching Google query {query}: {e}")
-        return results
-
-    tasks = [fetch_and_parse(q) for q in queries]
-    results = await asyncio.gather(*tasks)
-    return [item for sublist in results for item in sublist]
+def classify_incident(title: str, description: str, origin: str) -> tuple[str, str]:
+    return _classifier.classify(title, description, origin)
 
 from routers.ws import live_incidents_manager
 
+def serialize_incident(i: Incident) -> Dict[str, Any]:
+    return {
+        "id": i.id,
+        "title": i.title,
+        "source": i.source,
+        "severity": i.severity,
+        "sector": i.sector,
+        "link": i.link,
+        "origin": i.origin,
+        "published_at": i.published_at.isoformat() + "Z" if i.published_at else None,
+        "created_at": i.created_at.isoformat() + "Z" if i.created_at else None,
+        "cluster_id": i.cluster_id if i.cluster_id is not None else i.id
+    }
+
 # -------------------------------------------------------------------------
-# BACKGROUND TASK
+# INGESTION (shared by every feed source)
 # -------------------------------------------------------------------------
-async def sync_incidents_task():
-    print("Running background cyber incidents sync (Google News Only)...")
-    raw_incidents = await fetch_google_news()
-    
-    # Sort incidents by published_at explicitly before inserting to satisfy date ordering requirement
-    raw_incidents.sort(key=lambda x: x["published_at"], reverse=True)
-    
+# Syndicated copies of one story are grouped by MinHash/LSH (near_duplicates.py)
+_near_duplicates = NearDuplicateIndex()
+_cluster_lock = threading.Lock()
+
+def _store_incidents(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stores the new items; returns the new cluster heads (the rows worth broadcasting)."""
+    hashes = [link_hash(item["link"]) for item in items]
+
     db = SessionLocal()
-    new_incidents_for_broadcast = []
-    
     try:
-        for item in raw_incidents:
-            if not item.get("link"):
-                continue
-                
-            severity, sector = classify_incident(item["title"], item["description"], item["origin"])
-            
-            link_hash = hashlib.sha256(item["link"].encode('utf-8')).hexdigest()
-            incident_db = Incident(
-                title=item["title"][:500],
-                source=item["source"][:200],
-                severity=severity,
-                sector=sector,
-                link=item["link"],
-                link_hash=link_hash,
-                origin=item["origin"][:100],
-                published_at=item["published_at"]
-            )
-            
-            try:
-                db.add(incident_db)
-                db.commit()
-                db.refresh(incident_db)
-                
-                # If we successfully committed, it's new!
-                new_incidents_for_broadcast.append({
-                    "id": incident_db.id,
-                    "title": incident_db.title,
-                    "source": incident_db.source,
-                    "severity": incident_db.severity,
-                    "sector": incident_db.sector,
-                    "link": incident_db.link,
-                    "origin": incident_db.origin,
-                    "published_at": incident_db.published_at.isoformat() + "Z" if incident_db.published_at else None,
-                    "created_at": incident_db.created_at.isoformat() + "Z" if incident_db.created_at else None
-                })
-            except IntegrityError:
-                db.rollback() # Duplicate link
-            except Exception as e:
-                db.rollback()
-                print(f"DB Error logic: {e}")
-                
-        # Broadcast all new incidents to connected WebSocket clients
-        for new_item in new_incidents_for_broadcast:
-            await live_incidents_manager.broadcast({
-                "type": "new_incident",
-                "data": new_item
+        # One IN query finds the links we already have; only new ones are
+        # classified and inserted, in a single batch
+        seen = existing_link_hashes(db, hashes)
+        new_items = []
+        for item, item_hash in zip(items, hashes):
+            if item_hash not in seen:
+                seen.add(item_hash)
+                new_items.append((item, item_hash))
+        labels = _classifier.classify_batch(
+            (item["title"], item["description"], item["origin"]) for item, _ in new_items
+        )
+        sigs = [_near_duplicates.signature(item["title"], item["description"], item["source"])
+                for item, _ in new_items]
+        rows = []
+        for (item, item_hash), (severity, sector) in zip(new_items, labels):
+            rows.append({
+                "title": item["title"][:500],
+                "source": item["source"][:200],
+                "severity": severity,
+                "sector": sector,
+                "link": item["link"],
+                "link_hash": item_hash,
+                "origin": item["origin"][:100],
+                "published_at": item["published_at"],
             })
-            
+
+        try:
+            # Serialised so concurrent feeds cannot both open a cluster for one story
+            with _cluster_lock:
+                # Clustered oldest first, so a new cluster's head is its earliest copy.
+                # Indexed clusters whose head row is gone are not joined.
+                order = sorted(range(len(rows)), key=lambda k: rows[k]["published_at"])
+                refs = [None] * len(rows)
+                clusters = _near_duplicates.cluster_batch([sigs[k] for k in order], lambda ids: existing_ids(db, ids))
+                for k, (cluster_id, member) in zip(order, clusters):
+                    refs[k] = (cluster_id, order[member])
+                for row, (cluster_id, _) in zip(rows, refs):
+                    row["cluster_id"] = cluster_id
+
+                # Insert and cluster assignment commit together, so no row is
+                # left without its cluster id if the update fails
+                inserted = {i.link_hash: i for i in insert_incidents(db, rows, commit=False)}
+                lost = [row["link_hash"] for row in rows if row["link_hash"] not in inserted]
+                stored = {i.link_hash: i for i in incidents_by_link_hash(db, lost)} if lost else {}
+
+                # A new cluster takes the id of its head. If another worker
+                # stored the head first, the batch joins that row's cluster.
+                cluster_of, heads, updates, entries = {}, [], [], []
+                for k in order:
+                    row, sig, (cluster_id, head) = rows[k], sigs[k], refs[k]
+                    incident = inserted.get(row["link_hash"])
+                    if cluster_id is None:
+                        if head not in cluster_of:
+                            existing = stored.get(rows[head]["link_hash"])
+                            if existing is not None:
+                                if existing.cluster_id is None:
+                                    updates.append({"id": existing.id, "cluster_id": existing.id})
+                                cluster_of[head] = existing.cluster_id if existing.cluster_id is not None else existing.id
+                            elif incident is not None:
+                                cluster_of[head] = incident.id
+                        cluster_id = cluster_of.get(head)
+                        if incident is not None:
+                            updates.append({"id": incident.id, "cluster_id": cluster_id})
+                            if cluster_id == incident.id:
+                                heads.append((k, {**serialize_incident(incident), "cluster_id": cluster_id}))
+                    if incident is not None and sig is not None:
+                        entries.append((incident.id, cluster_id, sig))
+                if updates:
+                    db.execute(update(Incident), updates)
+                db.commit()
+                _near_duplicates.add_many(entries)
+            # Broadcast in feed order (newest first)
+            return [head for _, head in sorted(heads, key=lambda h: h[0])]
+        except Exception:
+            db.rollback()
+            raise
     finally:
         db.close()
 
 
+async def ingest_incidents(raw_incidents: List[Dict[str, Any]]) -> int:
+    """
+    Stores the new items of one feed fetch and broadcasts the first member of
+    each new near-duplicate cluster; returns how many were broadcast.
+    """
+    # Sort incidents by published_at explicitly before inserting to satisfy date ordering requirement
+    items = sorted((item for item in raw_incidents if item.get("link")),
+                   key=lambda x: x["published_at"], reverse=True)
+    if not items:
+        return 0
+    new_incidents_for_broadcast = await asyncio.to_thread(_store_incidents, items)
+
+    # Broadcast all new incidents to connected WebSocket clients
+    for new_item in new_incidents_for_broadcast:
+        await live_incidents_manager.broadcast({
+            "type": "new_incident",
+            "data": new_item
+        })
+    return len(new_incidents_for_broadcast)
+
+
+# -------------------------------------------------------------------------
+# BACKGROUND TASK
+# -------------------------------------------------------------------------
+# Sources, intervals and limits come from feeds.json (FEEDS_FILE)
+feed_engine = FeedEngine(load_sources(), ingest=ingest_incidents)
+
+
+async def sync_incidents_task():
+    """Scheduler tick: starts every feed source that is due, without waiting for them."""
+    started = feed_engine.run_due()
+    if started:
+        print(f"Running background cyber incidents sync: {', '.join(started)}")
+
+
 # -------------------------------------------------------------------------
 # ENDPOINT
 # -------------------------------------------------------------------------
@@ -156,23 +181,30 @@ async def get_india_incidents(db: Session = Depends(get_db)):
     Returns the latest India-focused cyber incidents instantly from the database.
     (Fetching occurs in the background task via APScheduler)
     """
-    db_incidents = db.query(Incident).order_by(Incident.published_at.desc()).limit(100).all()
+    # One row per near-duplicate cluster (its first member), with the cluster size
+    db_incidents = (
+        db.query(Incident)
+        .filter(or_(Incident.cluster_id.is_(None), Incident.cluster_id == Incident.id))
+        .order_by(Incident.published_at.desc())
+        .limit(100)
+        .all()
+    )
+    sizes = dict(
+        db.query(Incident.cluster_id, func.count())
+        .filter(Incident.cluster_id.in_([i.id for i in db_incidents]))
+        .group_by(Incident.cluster_id)
+    )
     
     return {
         "total_incidents": len(db_incidents),
         "last_updated": datetime.utcnow().isoformat() + "Z",
         "incidents": [
-            {
-                "id": i.id,
-                "title": i.title,
-                "source": i.source,
-                "severity": i.severity,
-                "sector": i.sector,
-                "link": i.link,
-                "origin": i.origin,
-                "published_at": i.published_at.isoformat() + "Z" if i.published_at else None,
-                "created_at": i.created_at.isoformat() + "Z" if i.created_at else None
-            }
+            {**serialize_incident(i), "cluster_size": sizes.get(i.id, 1)}
             for i in db_incidents
         ]
     }
+
+
+@router.get("/india-incidents/stats")
+async def get_india_incidents_stats():
+    return {**feed_engine.stats(), "near_duplicates": _near_duplicates.stats()}
@@ -2,13 +2,14 @@ import os
 import re
 import socket
 import base64
-import httpx
 import asyncio
 import datetime
 from typing import Dict, Any, Optional
 from urllib.parse import urlparse
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
+from http_client import get_client
+from singleflight import singleflight
 
 try:
     import whois
@@ -106,16 +107,21 @@ def _sync_get_whois_info(domain: str) -> dict:
         pass
     return {"age_days": None, "registrar": "Unknown"}
 
+@singleflight()
+async def _whois_lookup(domain: str) -> dict:
+    return await asyncio.to_thread(_sync_get_whois_info, domain)
+
 async def get_domain_info(url: str) -> dict:
     if not HAS_WHOIS: return {"age_days": None, "registrar": "Unknown"}
     domain = get_root_domain(url)
-    return await asyncio.to_thread(_sync_get_whois_info, domain)
+    # Keyed by root domain, so scans of different pages on one site share a lookup
+    return await _whois_lookup(domain)
 
+@singleflight()
 async def get_ip_intel(ip: str) -> dict:
     if not ip: return {"ip": "Unknown", "server_country": "Unknown", "isp": "Unknown"}
     try:
-        async with httpx.AsyncClient(timeout=4.0) as client:
-            res = await client.get(f"http://ip-api.com/json/{ip}?fields=status,country,isp,query")
+        res = await get_client().get(f"http://ip-api.com/json/{ip}?fields=status,country,isp,query", timeout=4.0)
         if res.status_code == 200:
             data = res.json()
             if data.get("status") == "success":
@@ -131,14 +137,16 @@ async def get_ip_intel(ip: str) -> dict:
 # EXTERNAL API SERVICES
 # -------------------------------------------------------------------------
 
+@singleflight()
 async def check_virustotal(url: str) -> dict:
     api_key = os.getenv("VIRUSTOTAL_API_KEY")
     if not api_key: return {"positives": 0, "total": 0}
     url_id = base64.urlsafe_b64encode(url.encode()).decode().rstrip("=")
     headers = {"x-apikey": api_key}
     try:
-        async with httpx.AsyncClient(timeout=6.0) as client:
-            res = await client.get(f"https://www.virustotal.com/api/v3/urls/{url_id}", headers=headers)
+        res = await get_client().get(
+            f"https://www.virustotal.com/api/v3/urls/{url_id}", headers=headers, timeout=6.0
+        )
         if res.status_code == 200:
             stats = res.json().get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
             positives = stats.get("malicious", 0) + stats.get("suspicious", 0)
@@ -146,22 +154,24 @@ async def check_virustotal(url: str) -> dict:
     except Exception: pass
     return {"positives": 0, "total": 0}
 
+@singleflight()
 async def check_abuseipdb(url: str) -> int:
     api_key = os.getenv("ABUSEIPDB_API_KEY")
     ip = get_ip_from_url(url)
     if not api_key or not ip: return 0
     try:
-        async with httpx.AsyncClient(timeout=6.0) as client:
-            res = await client.get(
-                "https://api.abuseipdb.com/api/v2/check",
-                params={"ipAddress": ip, "maxAgeInDays": 90},
-                headers={"Key": api_key, "Accept": "application/json"}
-            )
+        res = await get_client().get(
+            "https://api.abuseipdb.com/api/v2/check",
+            params={"ipAddress": ip, "maxAgeInDays": 90},
+            headers={"Key": api_key, "Accept": "application/json"},
+            timeout=6.0,
+        )
         if res.status_code == 200:
             return res.json().get("data", {}).get("abuseConfidenceScore", 0)
     except Exception: pass
     return 0
 
+@singleflight()
 async def check_google_safe_browsing(url: str) -> bool:
     api_key = os.getenv("GOOGLE_SAFE_BROWSING_KEY", "")
     if not api_key: return False
@@ -175,17 +185,20 @@ async def check_google_safe_browsing(url: str) -> bool:
         },
     }
     try:
-        async with httpx.AsyncClient(timeout=6.0) as client:
-            res = await client.post(f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={api_key}", json=payload)
+        res = await get_client().post(
+            f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={api_key}", json=payload, timeout=6.0
+        )
         if res.status_code == 200:
             return bool(res.json().get("matches"))
     except Exception: pass
     return False
 
+@singleflight()
 async def check_phishtank(url: str) -> bool:
     try:
-        async with httpx.AsyncClient(timeout=6.0) as client:
-            res = await client.post("https://checkurl.phishtank.com/checkurl/", data={"url": url, "format": "json"})
+        res = await get_client().post(
+            "https://checkurl.phishtank.com/checkurl/", data={"url": url, "format": "json"}, timeout=6.0
+        )
         if res.status_code == 200:
             results = res.json().get("results", {})
             return bool(results.get("in_database") and results.get("verified"))
@@ -1,14 +1,62 @@
+import asyncio
 import os
-from threading import Lock
+import time
+from threading import Lock, Thread
+from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
+from ml.micro_batcher import MicroBatcher
+from ml.model_registry import DEFAULT_REGISTRY_DIR, ModelRegistry
+
 router = APIRouter()
 
+MAX_BATCH_ITEMS = 5000
+
+# Concurrent /predict calls are coalesced into one encode + classify pass
+MICRO_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_WAIT_MS = float(os.getenv("PREDICT_BATCH_WAIT_MS", "5"))
+
+# Embedding cache: in-process LRU size and optional on-disk tier directory
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR") or None
+EMBEDDING_CACHE_REFRESH_S = float(os.getenv("EMBEDDING_CACHE_REFRESH_S", "30"))
+
+# "thread" runs the model in this process; "process" runs it in a pool of
+# PREDICT_WORKERS worker processes that each load the models once
+INFERENCE_MODE = os.getenv("PREDICT_INFERENCE_MODE", "thread").lower()
+INFERENCE_WORKERS = int(os.getenv("PREDICT_WORKERS", "0")) or None
+INFERENCE_TORCH_THREADS = int(os.getenv("PREDICT_WORKER_THREADS", "1"))
+
+# "sklearn" or "compiled" (flattened NumPy evaluator for tree ensembles)
+CLASSIFIER_BACKEND = os.getenv("PREDICT_CLASSIFIER_BACKEND", "sklearn").lower()
+
+MODEL_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "ml", "models"))
+
+# Versioned classifiers; ACTIVE is re-read at most every MODEL_REGISTRY_POLL_S
+# seconds so every worker converges on the same version without a restart
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR") or DEFAULT_REGISTRY_DIR
+MODEL_REGISTRY_POLL_S = float(os.getenv("MODEL_REGISTRY_POLL_S", "10"))
+
 _predictor = None
 _predictor_lock = Lock()
 
+_inference_pool = None
+
+_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+_registry_state = {"checked_at": float("-inf"), "active": None}
+
+# Startup warm-up progress: cold -> warming -> ready | failed
+_warmup = {"status": "cold", "error": None, "duration_s": None}
+
+_WARMUP_SAMPLE = {
+    "cve_id": "WARMUP",
+    "cvss_score": 5.0,
+    "description": "warm up request for the prediction pipeline",
+    "product": "warmup",
+}
+
 
 class PredictRequest(BaseModel):
     description: str = Field(min_length=5, max_length=10000)
@@ -20,6 +68,24 @@ class PredictResponse(BaseModel):
     risk_score: float
     priority: str
     probability: str
+    model_version: Optional[str] = None
+
+
+class PredictBatchItem(PredictRequest):
+    cve_id: Optional[str] = Field(default=None, max_length=50)
+
+
+class PredictBatchRequest(BaseModel):
+    items: List[PredictBatchItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class PredictBatchResult(PredictResponse):
+    cve_id: str
+
+
+class PredictBatchResponse(BaseModel):
+    count: int
+    results: List[PredictBatchResult]
 
 
 def _resolve_priority(risk_score: float) -> str:
@@ -52,17 +118,121 @@ def _get_predictor():
             # Import lazily so app startup does not fail if ML deps are missing.
             from ml.step_6_prediction import CVEPredictor
 
-            model_dir = os.path.normpath(
-                os.path.join(os.path.dirname(__file__), "..", "ml", "models")
+            _predictor = CVEPredictor(
+                model_dir=MODEL_DIR,
+                cache_size=EMBEDDING_CACHE_SIZE,
+                cache_dir=EMBEDDING_CACHE_DIR,
+                classifier_backend=CLASSIFIER_BACKEND,
+                registry_dir=MODEL_REGISTRY_DIR,
             )
-            _predictor = CVEPredictor(model_dir=model_dir)
             return _predictor
         except Exception as exc:
             raise RuntimeError(f"Failed to initialize prediction model: {exc}") from exc
 
 
+def _get_inference_pool():
+    global _inference_pool
+
+    if _inference_pool is not None:
+        return _inference_pool
+
+    with _predictor_lock:
+        if _inference_pool is None:
+            from ml.inference_pool import InferencePool
+
+            _inference_pool = InferencePool(
+                model_dir=MODEL_DIR,
+                workers=INFERENCE_WORKERS,
+                cache_size=EMBEDDING_CACHE_SIZE,
+                cache_dir=EMBEDDING_CACHE_DIR,
+                torch_threads=INFERENCE_TORCH_THREADS,
+                classifier_backend=CLASSIFIER_BACKEND,
+                registry_dir=MODEL_REGISTRY_DIR,
+                cache_refresh_s=EMBEDDING_CACHE_REFRESH_S,
+            )
+        return _inference_pool
+
+
+def _active_model_version(force=False):
+    """Registry ACTIVE version, re-read at most every MODEL_REGISTRY_POLL_S."""
+    now = time.monotonic()
+    if force or now - _registry_state["checked_at"] >= MODEL_REGISTRY_POLL_S:
+        _registry_state["checked_at"] = now
+        try:
+            _registry_state["active"] = _registry.active_version()
+        except OSError as exc:
+            print(f"Could not read model registry: {exc}")
+    return _registry_state["active"]
+
+
+async def _run_predict_batch(items):
+    version = _active_model_version()
+
+    if INFERENCE_MODE == "process":
+        try:
+            pool = _get_inference_pool()
+        except Exception as exc:
+            raise RuntimeError(f"Failed to start inference workers: {exc}") from exc
+        return await pool.predict_batch(items, model_version=version)
+
+    def _run():
+        predictor = _get_predictor()
+        # Loads in the background (once per version); the current model answers meanwhile
+        predictor.request_version(version)
+        return predictor.predict_batch(items)
+
+    return await asyncio.to_thread(_run)
+
+
+def shutdown_inference_pool():
+    if _inference_pool is not None:
+        _inference_pool.shutdown()
+
+
+# In process mode each pool worker takes one batch at a time, so keep every
+# worker busy; in thread mode one predictor (and torch's own threads) runs them
+_batcher = MicroBatcher(
+    _run_predict_batch,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_WAIT_MS,
+    max_concurrency=(INFERENCE_WORKERS or os.cpu_count() or 1) if INFERENCE_MODE == "process" else 1,
+)
+
+
+def warm_up_predictor():
+    """
+    Load the predictor and push one dummy request through it so the
+    transformer, tokenizer and classifier are fully initialised before the
+    first real caller arrives. In process mode every pool worker is warmed.
+    Blocking; see start_predictor_warmup().
+    """
+    _warmup.update(status="warming", error=None)
+    started = time.perf_counter()
+    try:
+        if INFERENCE_MODE == "process":
+            _get_inference_pool().warm_up(_WARMUP_SAMPLE)
+        else:
+            _get_predictor().predict_batch([_WARMUP_SAMPLE])
+    except Exception as exc:
+        _warmup.update(status="failed", error=str(exc))
+        print(f"Prediction model warm-up failed: {exc}")
+        return
+    _warmup.update(status="ready", duration_s=round(time.perf_counter() - started, 2))
+    print(f"Prediction model warm-up finished in {_warmup['duration_s']}s")
+
+
+def start_predictor_warmup():
+    thread = Thread(target=warm_up_predictor, name="predictor-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def predictor_warmup_state() -> dict:
+    return dict(_warmup)
+
+
 @router.post("/predict", response_model=PredictResponse)
-def predict_vulnerability(payload: PredictRequest):
+async def predict_vulnerability(payload: PredictRequest):
     description = payload.description.strip()
     product = payload.product.strip()
 
@@ -70,21 +240,119 @@ def predict_vulnerability(payload: PredictRequest):
         raise HTTPException(status_code=400, detail="Description and product are required")
 
     try:
-        predictor = _get_predictor()
-        prediction = predictor.predict(
-            cve_id="UI_INPUT",
-            cvss_score=payload.cvss,
-            description=description,
-            product=product,
-        )
+        prediction = await _batcher.submit({
+            "cve_id": "UI_INPUT",
+            "cvss_score": payload.cvss,
+            "description": description,
+            "product": product,
+        })
 
         risk_score = float(prediction["risk_score"])
         return {
             "risk_score": round(risk_score, 2),
             "priority": _resolve_priority(risk_score),
             "probability": _resolve_probability(risk_score),
+            "model_version": prediction.get("model_version"),
         }
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}") from exc
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}") from exc
+
+
+@router.get("/predict/stats")
+def predict_stats():
+    """Micro-batching histograms and embedding cache hit/miss counters (summed over workers)."""
+    if _inference_pool is not None:
+        embedding_cache = _inference_pool.embedding_cache_stats()
+    else:
+        embedding_cache = _predictor.embedding_cache.stats() if _predictor is not None else None
+    return {
+        "inference": _inference_pool.stats() if _inference_pool is not None else {"mode": INFERENCE_MODE},
+        "micro_batching": _batcher.stats(),
+        "embedding_cache": embedding_cache,
+    }
+
+
+@router.post("/predict/batch", response_model=PredictBatchResponse)
+async def predict_vulnerability_batch(payload: PredictBatchRequest):
+    items = []
+    for index, item in enumerate(payload.items):
+        description = item.description.strip()
+        product = item.product.strip()
+        if not description or not product:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Description and product are required (item {index})",
+            )
+        items.append({
+            "cve_id": item.cve_id or f"BATCH_{index}",
+            "cvss_score": item.cvss,
+            "description": description,
+            "product": product,
+        })
+
+    try:
+        predictions = await _run_predict_batch(items)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}") from exc
+
+    results = []
+    for prediction in predictions:
+        risk_score = float(prediction["risk_score"])
+        results.append({
+            "cve_id": prediction["cve_id"],
+            "risk_score": round(risk_score, 2),
+            "priority": _resolve_priority(risk_score),
+            "probability": _resolve_probability(risk_score),
+            "model_version": prediction.get("model_version"),
+        })
+    return {"count": len(results), "results": results}
+
+
+@router.get("/predict/models")
+def list_model_versions():
+    if INFERENCE_MODE == "process":
+        # What the workers reported serving; several while a swap is rolling out
+        served = _inference_pool.served_versions() if _inference_pool is not None else []
+        failed = _inference_pool.failed_versions() if _inference_pool is not None else {}
+    else:
+        served = [_predictor.model_version] if _predictor is not None else []
+        failed = dict(_predictor.failed_versions) if _predictor is not None else {}
+    return {
+        "active_version": _active_model_version(force=True),
+        "served_version": served[0] if len(served) == 1 else None,
+        "served_versions": served,
+        "failed_versions": failed,
+        "versions": _registry.versions(),
+    }
+
+
+@router.post("/predict/models/{version}/activate")
+async def activate_model_version(version: str):
+    """
+    Load and validate `version`, then point the registry at it. In thread
+    mode the load is the hot-swap itself; in process mode one worker does a
+    throwaway load. ACTIVE only moves once that succeeded, so a broken
+    artifact never becomes what every worker tries to serve. The embedder
+    stays loaded, so there is no cold start; other workers pick the change
+    up within MODEL_REGISTRY_POLL_S seconds.
+    """
+    try:
+        await asyncio.to_thread(_registry.manifest, version)
+    except (KeyError, ValueError) as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+    try:
+        if INFERENCE_MODE == "process":
+            await _get_inference_pool().check_version(version)
+        else:
+            await asyncio.to_thread(lambda: _get_predictor().activate_version(version))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Model version {version} failed to load: {exc}") from exc
+
+    await asyncio.to_thread(_registry.activate, version)
+    _active_model_version(force=True)
+    return {"active_version": version}
@@ -0,0 +1,260 @@
+"""
+Semantic CVE search over the local NVD mirror.
+
+CVE descriptions are embedded once with the bundled MiniLM model into a
+unit-normalised float32 matrix (SEMANTIC_INDEX_DIR, default
+backend/semantic_index):
+
+    vectors.f32    (n, dim) float32, memory-mapped for search
+    ids.txt        cve_id per row
+    meta.json      n, dim, model, IVF settings
+    centroids.npy  (optional) IVF coarse centroids
+    offsets.npy    (optional) row ranges of each IVF list
+
+A query is embedded with the same model and scored by dot product (cosine
+on unit vectors) in fixed-size blocks, so the matrix is streamed through
+the page cache instead of loaded. For large corpora, `--ivf-lists` clusters
+the rows with k-means and stores them grouped by cluster; a query then
+scores only the `nprobe` closest clusters, which are contiguous on disk.
+
+Usage (from backend, after the mirror has been synced):
+    python semantic_search.py build --ivf-lists 1024
+    python semantic_search.py search "attacker can run commands on the server"
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+from typing import Optional
+
+import numpy as np
+
+SEMANTIC_INDEX_DIR = os.getenv("SEMANTIC_INDEX_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "semantic_index"
+)
+MINILM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml", "models", "minilm_model")
+SEMANTIC_NPROBE = int(os.getenv("SEMANTIC_NPROBE", "16"))
+
+BLOCK_ROWS = 65536
+
+
+def _normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _merge_topk(best_scores, best_rows, scores, rows, k):
+    scores = np.concatenate([best_scores, scores])
+    rows = np.concatenate([best_rows, rows])
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, rows = scores[keep], rows[keep]
+    return scores, rows
+
+
+def kmeans(data, n_clusters, iterations=10, seed=0):
+    """Spherical k-means (cosine) on unit vectors; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=n_clusters)
+        empty = counts == 0
+        # Re-seed empty clusters from random points
+        sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class VectorIndex:
+    def __init__(self, root=SEMANTIC_INDEX_DIR):
+        self.root = root
+        with open(os.path.join(root, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.dim = self.meta["dim"]
+        n = self.meta["n"]
+        self.vectors = np.memmap(os.path.join(root, "vectors.f32"), dtype=np.float32, mode="r",
+                                 shape=(n, self.dim)) if n else np.empty((0, self.dim), np.float32)
+        with open(os.path.join(root, "ids.txt"), "r", encoding="utf-8") as f:
+            self.ids = [line.rstrip("\n") for line in f]
+        self.centroids = self.offsets = None
+        if self.meta.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(root, "centroids.npy"))
+            self.offsets = np.load(os.path.join(root, "offsets.npy"))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def write(root, vectors, ids, model=None, ivf_lists=0, sample_size=100000, seed=0):
+        """
+        Writes a new index under `root`, replacing any existing one. Rows are
+        normalised; with ivf_lists > 0 they are stored grouped by cluster.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        order = np.arange(n)
+        centroids = offsets = None
+        if ivf_lists and n >= ivf_lists:
+            rng = np.random.default_rng(seed)
+            sample = _normalize(vectors[np.sort(rng.choice(n, min(n, sample_size), replace=False))])
+            centroids = kmeans(sample, ivf_lists, seed=seed)
+            assign = np.empty(n, dtype=np.int64)
+            for start in range(0, n, BLOCK_ROWS):
+                block = _normalize(vectors[start:start + BLOCK_ROWS])
+                assign[start:start + BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=ivf_lists))])
+
+        staging = root.rstrip(os.sep) + f".tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        if n:
+            out = np.memmap(os.path.join(staging, "vectors.f32"), dtype=np.float32, mode="w+", shape=(n, dim))
+            for start in range(0, n, BLOCK_ROWS):
+                out[start:start + BLOCK_ROWS] = _normalize(vectors[order[start:start + BLOCK_ROWS]])
+            out.flush()
+            del out
+        else:
+            open(os.path.join(staging, "vectors.f32"), "wb").close()
+        with open(os.path.join(staging, "ids.txt"), "w", encoding="utf-8") as f:
+            f.writelines(f"{ids[i]}\n" for i in order)
+        if centroids is not None:
+            np.save(os.path.join(staging, "centroids.npy"), centroids)
+            np.save(os.path.join(staging, "offsets.npy"), offsets)
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"n": int(n), "dim": int(dim), "model": model,
+                       "ivf_lists": int(len(centroids)) if centroids is not None else 0}, f, indent=2)
+
+        # Directories cannot be swapped atomically; readers that already
+        # mapped the old files keep them until they reload
+        retired = root.rstrip(os.sep) + f".old-{os.getpid()}"
+        if os.path.exists(root):
+            os.replace(root, retired)
+        os.replace(staging, root)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def _score_rows(self, query, start, stop, k, best):
+        for block_start in range(start, stop, BLOCK_ROWS):
+            block_stop = min(stop, block_start + BLOCK_ROWS)
+            scores = self.vectors[block_start:block_stop] @ query
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(scores))
+            best = _merge_topk(best[0], best[1], scores[top], top + block_start, k)
+        return best
+
+    def search(self, query, k=10, nprobe=None):
+        """
+        Returns [(cve_id, cosine)] best first. Exact unless the index has IVF
+        lists and nprobe is not 0.
+        """
+        if not len(self) or k <= 0:
+            return []
+        query = _normalize(query).reshape(-1)
+        best = (np.empty(0, np.float32), np.empty(0, np.int64))
+
+        nprobe = SEMANTIC_NPROBE if nprobe is None else nprobe
+        if self.centroids is not None and nprobe:
+            lists = np.argsort(-(self.centroids @ query))[:nprobe]
+            for c in lists:
+                best = self._score_rows(query, int(self.offsets[c]), int(self.offsets[c + 1]), k, best)
+        else:
+            best = self._score_rows(query, 0, len(self), k, best)
+
+        order = np.argsort(-best[0], kind="stable")
+        return [(self.ids[int(best[1][i])], float(best[0][i])) for i in order]
+
+
+# ── Process-wide index and encoder ─────────────────────────────────────────────
+
+_index: Optional[VectorIndex] = None
+_index_mtime = None
+_lock = threading.Lock()
+
+
+def get_index() -> Optional[VectorIndex]:
+    """The current index, reloaded when a rebuild has replaced it; None if not built."""
+    global _index, _index_mtime
+    meta = os.path.join(SEMANTIC_INDEX_DIR, "meta.json")
+    try:
+        mtime = os.stat(meta).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _lock:
+        if _index is None or mtime != _index_mtime:
+            _index, _index_mtime = VectorIndex(SEMANTIC_INDEX_DIR), mtime
+        return _index
+
+
+def _get_encoder(model_path=MINILM_PATH):
+    # The same instance the prediction pipeline embeds with
+    from ml.shared_encoder import load_encoder
+    return load_encoder(model_path)
+
+
+def embed_query(text: str) -> np.ndarray:
+    return _normalize(_get_encoder().encode([text], show_progress_bar=False))[0]
+
+
+def build_from_mirror(mirror, root=SEMANTIC_INDEX_DIR, model_path=MINILM_PATH, ivf_lists=0, batch_size=256):
+    """Embeds every mirrored CVE description and writes a fresh index."""
+    encoder = _get_encoder(model_path)
+    conn = mirror._conn()
+    n = conn.execute("SELECT count(*) FROM cves").fetchone()[0]
+    dim = encoder.get_sentence_embedding_dimension()
+
+    scratch = root.rstrip(os.sep) + ".raw.f32"
+    vectors = np.memmap(scratch, dtype=np.float32, mode="w+", shape=(max(n, 1), dim))
+    ids = []
+    cursor = conn.execute("SELECT cve_id, description FROM cves ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        vectors[len(ids):len(ids) + len(rows)] = encoder.encode(
+            [r[1] for r in rows], batch_size=batch_size, show_progress_bar=False
+        )
+        ids.extend(r[0] for r in rows)
+        print(f"\r  embedded {len(ids)}/{n}", end="", flush=True)
+    print()
+    try:
+        VectorIndex.write(root, vectors[:len(ids)], ids, model=os.path.basename(model_path), ivf_lists=ivf_lists)
+    finally:
+        del vectors
+        os.remove(scratch)
+    return len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the semantic CVE index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="embed the NVD mirror into a vector index")
+    build.add_argument("--ivf-lists", type=int, default=0, help="IVF clusters (0 = exact search only)")
+    srch = sub.add_parser("search")
+    srch.add_argument("query")
+    srch.add_argument("-k", type=int, default=10)
+    srch.add_argument("--nprobe", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from nvd_mirror import get_mirror
+        mirror = get_mirror()
+        if mirror is None:
+            raise SystemExit("No NVD mirror found; run `python nvd_mirror.py sync` first")
+        print(f"Indexed {build_from_mirror(mirror, ivf_lists=args.ivf_lists)} CVEs into {SEMANTIC_INDEX_DIR}")
+    else:
+        index = get_index()
+        if index is None:
+            raise SystemExit("No semantic index; run `python semantic_search.py build` first")
+        for cve_id, score in index.search(embed_query(args.query), k=args.k, nprobe=args.nprobe):
+            print(f"  {score:.3f}  {cve_id}")
+
+
+if __name__ == "__main__":
+    main()
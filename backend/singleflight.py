@@ -0,0 +1,70 @@
+"""
+Single-flight coalescing for async upstream lookups.
+
+Concurrent calls with the same key share one in-flight task: the first
+caller starts it, later callers await the same result (or exception), and
+the key is forgotten as soon as the task finishes, so nothing is cached.
+Waiters are shielded from each other: a client disconnecting cancels its
+own await, not the upstream call the other requests are waiting on.
+
+    @singleflight()
+    async def get_ip_intel(ip: str) -> dict: ...
+
+Results are shared by reference; callers must not mutate them.
+"""
+import asyncio
+import functools
+
+
+class SingleFlight:
+    def __init__(self, name=""):
+        self.name = name
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, key=key: self._forget(key, _t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # A leader-less failure (every waiter cancelled) must not be reported as unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+def singleflight(key=None):
+    """
+    Decorator for async functions. `key(*args, **kwargs)` picks the
+    coalescing key; by default it is the call's positional and keyword
+    arguments.
+    """
+    def decorate(fn):
+        group = SingleFlight(fn.__qualname__)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return await group.do(k, fn, *args, **kwargs)
+
+        wrapper.singleflight = group
+        return wrapper
+    return decorate
+
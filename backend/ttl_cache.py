@@ -0,0 +1,90 @@
+"""
+Bounded in-process cache with a freshness TTL and a stale-while-revalidate
+window.
+
+An entry is "fresh" for `ttl` seconds after it was stored, then "stale" for
+another `stale_ttl` seconds, after which it is dropped. Callers serve stale
+entries immediately and refresh them in the background; `begin_refresh`
+makes sure only one refresh per key is in flight.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class TTLCache:
+    def __init__(self, maxsize=512, ttl=900.0, stale_ttl=3600.0, clock=time.monotonic):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._refreshing = set()
+        self._lock = Lock()
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns (value, state) where state is FRESH, STALE or MISS."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.fresh_hits += 1
+                    return entry[1], FRESH
+                if age <= self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    return entry[1], STALE
+                del self._entries[key]
+            self.misses += 1
+            return None, MISS
+
+    def set(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, key):
+        """True if the caller should refresh `key`; False if a refresh is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "stale_ttl_s": self.stale_ttl,
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.fresh_hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "refreshing": len(self._refreshing),
+            }